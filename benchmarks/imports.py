@@ -0,0 +1,40 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+import event_loop.factory
+
+
+def statements():
+    yield 'lazy', 'import event_loop'
+    backends = ['event_loop.%s' % cls
+                for name, (_, cls) in event_loop.factory.BACKENDS.items()
+                if event_loop.factory.available(name)]
+    yield 'eager', '; '.join(['import event_loop'] + backends)
+
+
+def measure(statement, repeat):
+    code = ('import time; start = time.perf_counter(); %s; '
+            'print(time.perf_counter() - start)' % statement)
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', code])
+        timings.append(float(output))
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the time it takes to import event_loop'
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for name, statement in statements():
+        print('%-6s %8.2fms  %s' % (name, measure(statement, args.repeat) * 1000,
+                                    statement))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+import event_loop.factory
+
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    summary = {'p%g' % (q * 100): samples[min(len(samples) - 1,
+                                              int(q * len(samples)))]
+               for q in PERCENTILES}
+    summary['max'] = samples[-1]
+    summary['samples'] = len(samples)
+    return summary
+
+
+def socket_pair():
+    first, second = socket.socketpair()
+    first.setblocking(False)
+    second.setblocking(False)
+    return first, second
+
+
+def future_ticks(factory, count, batch=100):
+    loop = factory()
+    remaining = [count]
+
+    def listener():
+        remaining[0] -= 1
+
+    start = time.perf_counter()
+    while remaining[0] > 0:
+        for _ in range(batch):
+            loop.future_tick(listener)
+        loop.run()
+    return {'ticks_per_second': count / (time.perf_counter() - start)}
+
+
+def timers(factory, count, cancel_rate=0.5, max_interval=0.01):
+    loop = factory()
+    fired = [0]
+
+    def callback():
+        fired[0] += 1
+
+    intervals = [random.uniform(0, max_interval) for _ in range(count)]
+    start = time.perf_counter()
+    pending = [loop.add_timer(interval, callback) for interval in intervals]
+    added = time.perf_counter()
+    for timer in pending[:int(count * cancel_rate)]:
+        loop.cancel_timer(timer)
+    cancelled = time.perf_counter()
+    time.sleep(max_interval)
+    expiring = time.perf_counter()
+    loop.run()
+    finished = time.perf_counter()
+    return {
+        'timers': count,
+        'add_per_second': count / (added - start),
+        'cancel_per_second': int(count * cancel_rate) / (cancelled - added),
+        'fire_per_second': fired[0] / (finished - expiring),
+        'fired': fired[0]
+    }
+
+
+def ping_pong(factory, round_trips):
+    loop = factory()
+    left, right = socket_pair()
+    samples = []
+    sent_at = [0.0]
+
+    def echo(stream):
+        stream.send(stream.recv(1))
+
+    def pong(stream):
+        stream.recv(1)
+        samples.append(time.perf_counter() - sent_at[0])
+        if len(samples) == round_trips:
+            loop.remove_read_stream(left)
+            loop.remove_read_stream(right)
+            return
+        sent_at[0] = time.perf_counter()
+        stream.send(b'.')
+
+    loop.add_read_stream(right, echo)
+    loop.add_read_stream(left, pong)
+    sent_at[0] = time.perf_counter()
+    left.send(b'.')
+    loop.run()
+    left.close()
+    right.close()
+    return {'round_trip_seconds': summarize(samples)}
+
+
+def fan_out(factory, idle, active, rounds):
+    loop = factory()
+    idle_pairs = [socket_pair() for _ in range(idle)]
+    active_pairs = [socket_pair() for _ in range(active)]
+    received = [0]
+
+    def ignore(stream):
+        pass
+
+    def read(stream):
+        stream.recv(1)
+        received[0] += 1
+        if received[0] % active == 0:
+            loop.stop()
+
+    try:
+        for reader, _ in idle_pairs:
+            loop.add_read_stream(reader, ignore)
+        for reader, _ in active_pairs:
+            loop.add_read_stream(reader, read)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for _, writer in active_pairs:
+                writer.send(b'.')
+            loop.run()
+        elapsed = time.perf_counter() - start
+    finally:
+        for pair in idle_pairs + active_pairs:
+            for stream in pair:
+                stream.close()
+    return {
+        'idle': idle,
+        'active': active,
+        'events_per_second': received[0] / elapsed,
+        'round_seconds': elapsed / rounds
+    }
+
+
+def signals(factory, deliveries, signum=signal.SIGUSR1):
+    loop = factory()
+    samples = []
+    sent_at = [0.0]
+    delivered = threading.Event()
+
+    def listener(*args):
+        samples.append(time.perf_counter() - sent_at[0])
+        if len(samples) == deliveries:
+            loop.remove_signal(signum, listener)
+        delivered.set()
+
+    def send():
+        for _ in range(deliveries):
+            delivered.clear()
+            sent_at[0] = time.perf_counter()
+            os.kill(os.getpid(), signum)
+            delivered.wait(1)
+            time.sleep(0.001)
+
+    loop.add_signal(signum, listener)
+    sender = threading.Thread(target=send)
+    sender.start()
+    loop.run()
+    sender.join()
+    return {'delivery_seconds': summarize(samples)}
+
+
+def run_backend(factory, args):
+    results = {
+        'future_tick': future_ticks(factory, args.ticks),
+        'timers': [timers(factory, 10 ** exponent)
+                   for exponent in range(3, args.max_exponent + 1)],
+        'ping_pong': ping_pong(factory, args.round_trips),
+        'fan_out': [],
+        'signal': signals(factory, args.signals)
+    }
+    for idle in args.idle:
+        try:
+            results['fan_out'].append(
+                fan_out(factory, idle, args.active, args.rounds)
+            )
+        except (OSError, ValueError) as error:
+            results['fan_out'].append({'idle': idle, 'active': args.active,
+                                       'error': str(error)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the event loop backends and print JSON'
+    )
+    parser.add_argument('--backends', default=','.join(event_loop.factory.PREFERENCE))
+    parser.add_argument('--ticks', type=int, default=10 ** 6)
+    parser.add_argument('--max-exponent', type=int, default=5)
+    parser.add_argument('--round-trips', type=int, default=10000)
+    parser.add_argument('--idle', type=int, nargs='+', default=[0, 100, 400])
+    parser.add_argument('--active', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=1000)
+    parser.add_argument('--signals', type=int, default=200)
+    parser.add_argument('--output', type=argparse.FileType('w'),
+                        default=sys.stdout)
+    args = parser.parse_args()
+
+    report = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'backends': {}
+    }
+    for name in args.backends.split(','):
+        if not event_loop.factory.available(name):
+            report['backends'][name] = {'error': 'unavailable'}
+            continue
+        report['backends'][name] = run_backend(event_loop.factory.load(name),
+                                               args)
+    json.dump(report, args.output, indent=2)
+    args.output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
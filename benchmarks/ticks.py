@@ -0,0 +1,61 @@
+import argparse
+import queue
+import time
+
+import event_loop.tick
+
+
+class LockingFutureTickQueue:
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def empty(self):
+        return self.queue.empty()
+
+    def add(self, listener):
+        self.queue.put(listener)
+
+    def tick(self):
+        amount = self.queue.qsize()
+        while amount > 0:
+            amount -= 1
+            listener = self.queue.get()
+            listener()
+
+
+IMPLEMENTATIONS = {
+    'queue': LockingFutureTickQueue,
+    'deque': event_loop.tick.FutureTickQueue
+}
+
+
+def measure(factory, count, batch):
+    future_tick_queue = factory()
+
+    def listener():
+        pass
+
+    start = time.perf_counter()
+    for _ in range(count // batch):
+        for _ in range(batch):
+            future_tick_queue.add(listener)
+        while not future_tick_queue.empty():
+            future_tick_queue.tick()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure future_tick throughput of the tick queues'
+    )
+    parser.add_argument('--count', type=int, default=10 ** 6)
+    parser.add_argument('--batch', type=int, default=100)
+    args = parser.parse_args()
+
+    for name, factory in IMPLEMENTATIONS.items():
+        ticks_per_second = measure(factory, args.count, args.batch)
+        print('%-6s %12.0f ticks/s' % (name, ticks_per_second))
+
+
+if __name__ == '__main__':
+    main()
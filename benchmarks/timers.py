@@ -0,0 +1,84 @@
+import argparse
+import random
+import time
+
+import event_loop.timer
+
+
+IMPLEMENTATIONS = {
+    'heap': event_loop.timer.Timers,
+    'wheel': event_loop.timer.TimingWheel
+}
+
+
+def virtual_clock(timers):
+    now = [time.monotonic()]
+
+    def update_time():
+        timers.time = now[0]
+        return timers.time
+
+    timers.update_time = update_time
+    return now
+
+
+def measure(factory, count, cancel_rate, max_interval, step):
+    timers = factory()
+    now = virtual_clock(timers)
+    fired = [0]
+
+    def callback():
+        fired[0] += 1
+
+    pending = [event_loop.timer.Timer(random.uniform(0, max_interval), callback)
+               for _ in range(count)]
+    cancelled = random.sample(pending, int(count * cancel_rate))
+
+    start = time.perf_counter()
+    for timer in pending:
+        timers.add(timer)
+    added = time.perf_counter()
+    for timer in cancelled:
+        timers.cancel(timer)
+    cancelled_at = time.perf_counter()
+    deadline = now[0] + max_interval + step
+    while now[0] < deadline:
+        now[0] += step
+        timers.get_first()
+        timers.tick()
+    expired = time.perf_counter()
+
+    assert timers.empty()
+    assert fired[0] == count - len(cancelled)
+    return {
+        'add': added - start,
+        'cancel': cancelled_at - added,
+        'expire': expired - cancelled_at,
+        'total': expired - start
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the heap and the timing wheel timers'
+    )
+    parser.add_argument('--max-exponent', type=int, default=5)
+    parser.add_argument('--cancel-rate', type=float, default=0.9)
+    parser.add_argument('--max-interval', type=float, default=60.0)
+    parser.add_argument('--step', type=float, default=0.01)
+    args = parser.parse_args()
+
+    print('%-6s %9s %9s %9s %9s %9s' %
+          ('impl', 'timers', 'add', 'cancel', 'expire', 'total'))
+    for exponent in range(3, args.max_exponent + 1):
+        for name, factory in IMPLEMENTATIONS.items():
+            result = measure(factory, 10 ** exponent, args.cancel_rate,
+                             args.max_interval, args.step)
+            print('%-6s %9d %8.3fs %8.3fs %8.3fs %8.3fs' % (
+                name, 10 ** exponent, result['add'], result['cancel'],
+                result['expire'], result['total']
+            ))
+
+
+if __name__ == '__main__':
+    main()
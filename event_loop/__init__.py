@@ -1,8 +1,21 @@
+import select
+
 from event_loop.select_loop import SelectLoop
-from event_loop.libev_loop import LibevLoop
-from event_loop.libuv_loop import LibuvLoop
+from event_loop.factory import create_loop
+import event_loop.factory
+
+
+def __getattr__(name):
+    for backend, (_, cls) in event_loop.factory.BACKENDS.items():
+        if cls == name:
+            loop_class = event_loop.factory.load(backend)
+            globals()[name] = loop_class
+            return loop_class
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
 
 
-__all__ = ['SelectLoop',
-           'LibevLoop',
-           'LibuvLoop']
+__all__ = ['SelectLoop', 'create_loop']
+if hasattr(select, 'epoll'):
+    __all__.append('EpollLoop')
+if hasattr(select, 'poll'):
+    __all__.append('PollLoop')
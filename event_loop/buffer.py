@@ -0,0 +1,63 @@
+import collections
+import itertools
+import os
+
+
+DEFAULT_MAX_CHUNKS = 1024
+
+
+def max_chunks():
+    try:
+        return os.sysconf('SC_IOV_MAX')
+    except (AttributeError, ValueError, OSError):
+        return DEFAULT_MAX_CHUNKS
+
+
+class OutputBuffer:
+    def __init__(self, limit=None):
+        self.limit = max_chunks() if limit is None else limit
+        self.chunks = collections.deque()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def append(self, data):
+        chunk = memoryview(data).cast('B')
+        if chunk.nbytes:
+            self.chunks.append(chunk)
+            self.size += chunk.nbytes
+
+    def extend(self, chunks):
+        for data in chunks:
+            self.append(data)
+
+    def clear(self):
+        self.chunks.clear()
+        self.size = 0
+
+    def flush(self, sock):
+        if not self.chunks:
+            return 0
+        if len(self.chunks) == 1 or not hasattr(sock, 'sendmsg'):
+            sent = sock.send(self.chunks[0])
+        elif len(self.chunks) <= self.limit:
+            sent = sock.sendmsg(self.chunks)
+        else:
+            sent = sock.sendmsg(itertools.islice(self.chunks, self.limit))
+        self.consume(sent)
+        return sent
+
+    def consume(self, sent):
+        self.size -= sent
+        chunks = self.chunks
+        while sent:
+            chunk = chunks[0]
+            if sent < chunk.nbytes:
+                chunks[0] = chunk[sent:]
+                return
+            sent -= chunk.nbytes
+            chunks.popleft()
@@ -0,0 +1,132 @@
+import event_loop.buffer
+
+
+DEFAULT_READ_SIZE = 2 ** 16
+DEFAULT_HIGH_WATER = 2 ** 16
+DEFAULT_LOW_WATER = 2 ** 14
+
+
+class Connection:
+    def __init__(self, loop, sock, on_data, on_close=None, on_pause=None,
+                 on_resume=None, read_size=DEFAULT_READ_SIZE,
+                 high_water=DEFAULT_HIGH_WATER, low_water=DEFAULT_LOW_WATER):
+        if low_water > high_water:
+            raise ValueError
+        self.loop = loop
+        self.sock = sock
+        self.on_data = on_data
+        self.on_close = on_close
+        self.on_pause = self.pause_reading if on_pause is None else on_pause
+        self.on_resume = self.resume_reading if on_resume is None else on_resume
+        self.high_water = high_water
+        self.low_water = low_water
+        self.read_buffer = bytearray(read_size)
+        self.read_view = memoryview(self.read_buffer)
+        self.write_buffer = event_loop.buffer.OutputBuffer()
+        self.reading = False
+        self.writing = False
+        self.paused = False
+        self.closing = False
+        self.closed = False
+        sock.setblocking(False)
+        self.resume_reading()
+
+    def pending(self):
+        return len(self.write_buffer)
+
+    def pause_reading(self):
+        if self.reading:
+            self.reading = False
+            self.loop.remove_read_stream(self.sock)
+
+    def resume_reading(self):
+        if not self.reading and not self.closing and not self.closed:
+            self.reading = True
+            self.loop.add_read_stream(self.sock, self.handle_read)
+
+    def handle_read(self, sock):
+        try:
+            received = sock.recv_into(self.read_buffer)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self.abort(exc)
+            return
+        if not received:
+            self.close()
+            return
+        self.on_data(self.read_view[:received])
+
+    def write(self, data):
+        if self.closing or self.closed:
+            raise ValueError
+        if not data:
+            return
+        if not self.write_buffer:
+            try:
+                sent = self.sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError as exc:
+                self.abort(exc)
+                return
+            if sent == len(data):
+                return
+            data = memoryview(data)[sent:]
+        self.write_buffer.append(data)
+        self.buffered()
+
+    def writelines(self, chunks):
+        if self.closing or self.closed:
+            raise ValueError
+        self.write_buffer.extend(chunks)
+        if self.write_buffer and not self.writing:
+            self.handle_write(self.sock)
+        if not self.closed:
+            self.buffered()
+
+    def buffered(self):
+        if self.write_buffer and not self.writing:
+            self.writing = True
+            self.loop.add_write_stream(self.sock, self.handle_write)
+        if not self.paused and len(self.write_buffer) > self.high_water:
+            self.paused = True
+            self.on_pause()
+
+    def handle_write(self, sock):
+        try:
+            self.write_buffer.flush(sock)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self.abort(exc)
+            return
+        if self.paused and len(self.write_buffer) <= self.low_water:
+            self.paused = False
+            self.on_resume()
+        if not self.write_buffer and self.writing:
+            self.writing = False
+            self.loop.remove_write_stream(sock)
+        if not self.write_buffer and self.closing:
+            self.abort()
+
+    def close(self):
+        if self.closing or self.closed:
+            return
+        self.closing = True
+        self.pause_reading()
+        if not self.write_buffer:
+            self.abort()
+
+    def abort(self, exc=None):
+        if self.closed:
+            return
+        self.closed = True
+        self.pause_reading()
+        if self.writing:
+            self.writing = False
+            self.loop.remove_write_stream(self.sock)
+        self.write_buffer.clear()
+        self.sock.close()
+        if self.on_close is not None:
+            self.on_close(exc)
@@ -0,0 +1,139 @@
+import collections
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+
+import event_loop.instrument
+
+
+DEFAULT_THRESHOLD = 0.1
+WATCHDOG_INTERVALS = 4
+
+logger = logging.getLogger('event_loop')
+
+SlowCallback = collections.namedtuple(
+    'SlowCallback',
+    ['kind', 'source', 'qualname', 'location', 'duration']
+)
+
+
+def describe(callback):
+    target = callback
+    while isinstance(target, functools.partial):
+        target = target.func
+    target = getattr(target, '__func__', target)
+    code = getattr(target, '__code__', None)
+    if code is None:
+        call = getattr(type(target), '__call__', None)
+        code = getattr(call, '__code__', None)
+    qualname = getattr(target, '__qualname__', None)
+    if qualname is None:
+        qualname = type(target).__qualname__
+    if code is None:
+        return qualname, None
+    return qualname, '%s:%d' % (code.co_filename, code.co_firstlineno)
+
+
+def log_slow_callback(slow):
+    logger.warning('Slow %s callback %s (%s) took %.3fs',
+                   slow.kind, slow.qualname, slow.location, slow.duration)
+
+
+def log_stall(elapsed, stack):
+    logger.warning('Loop iteration blocked for %.3fs:\n%s',
+                   elapsed, ''.join(stack))
+
+
+class Watchdog:
+    def __init__(self, limit, on_stall=log_stall, clock=time.monotonic):
+        self.limit = limit
+        self.on_stall = on_stall
+        self.clock = clock
+        self.thread_id = None
+        self.busy_since = None
+        self.reported = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def busy(self):
+        if self.thread is None:
+            self.start()
+        self.busy_since = self.clock()
+
+    def idle(self):
+        self.busy_since = None
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def watch(self):
+        while not self.stopped.wait(self.limit / WATCHDOG_INTERVALS):
+            busy_since = self.busy_since
+            if busy_since is None or busy_since == self.reported:
+                continue
+            elapsed = self.clock() - busy_since
+            if elapsed < self.limit:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.reported = busy_since
+            self.on_stall(elapsed, traceback.format_stack(frame))
+
+
+class SlowCallbackDetector(event_loop.instrument.Instrument):
+    def __init__(self, threshold=DEFAULT_THRESHOLD, watchdog=None,
+                 on_slow_callback=log_slow_callback, clock=time.perf_counter):
+        super().__init__(clock)
+        self.threshold = threshold
+        self.watchdog = watchdog
+        self.on_slow_callback = on_slow_callback
+
+    def begin_iteration(self, ticks, timers):
+        super().begin_iteration(ticks, timers)
+        if self.watchdog is not None:
+            self.watchdog.busy()
+
+    def begin_poll(self):
+        super().begin_poll()
+        if self.watchdog is not None:
+            self.watchdog.idle()
+
+    def end_run(self):
+        super().end_run()
+        if self.watchdog is not None:
+            self.watchdog.idle()
+
+    def end_poll(self):
+        super().end_poll()
+        if self.watchdog is not None:
+            self.watchdog.busy()
+
+    def record(self, kind, source, callback, start, duration):
+        super().record(kind, source, callback, start, duration)
+        if duration >= self.threshold:
+            qualname, location = describe(callback)
+            self.on_slow_callback(
+                SlowCallback(kind, source, qualname, location, duration)
+            )
+
+    def close(self):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+
+
+def enable(loop, threshold=DEFAULT_THRESHOLD, watchdog_limit=None):
+    watchdog = None if watchdog_limit is None else Watchdog(watchdog_limit)
+    detector = SlowCallbackDetector(threshold, watchdog)
+    loop.set_instrument(detector)
+    return detector
@@ -0,0 +1,79 @@
+import select
+
+import event_loop.mode
+import event_loop.select_loop
+
+
+READ_EVENTS = select.EPOLLIN | select.EPOLLHUP | select.EPOLLERR
+WRITE_EVENTS = select.EPOLLOUT | select.EPOLLHUP | select.EPOLLERR
+MODE_FLAGS = {
+    event_loop.mode.LEVEL: 0,
+    event_loop.mode.EDGE: select.EPOLLET,
+    event_loop.mode.ONESHOT: select.EPOLLONESHOT,
+    event_loop.mode.EDGE | event_loop.mode.ONESHOT:
+        select.EPOLLET | select.EPOLLONESHOT
+}
+
+
+class EpollLoop(event_loop.select_loop.SelectLoop):
+    modes = event_loop.mode.ALL
+
+    def __init__(self, timers=None, slack=0):
+        super().__init__(timers, slack)
+        self.epoll = select.epoll()
+        self.registered = {}
+        self.epoll.register(self.waker.fileno(), select.EPOLLIN)
+
+    def add_read_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        self.check_mode(stream, mode, self.write_modes)
+        super().add_read_stream(stream, listener, mode)
+
+    def add_write_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        self.check_mode(stream, mode, self.read_modes)
+        super().add_write_stream(stream, listener, mode)
+
+    def check_mode(self, stream, mode, other_modes):
+        other = other_modes.get(stream.fileno())
+        if other is not None and (other ^ mode) & event_loop.mode.EDGE:
+            raise ValueError
+
+    def event_mask(self, fd):
+        events = 0
+        flags = select.EPOLLET | select.EPOLLONESHOT
+        if fd in self.read_streams:
+            events |= select.EPOLLIN
+            flags &= MODE_FLAGS[self.read_modes[fd]]
+        if fd in self.write_streams:
+            events |= select.EPOLLOUT
+            flags &= MODE_FLAGS[self.write_modes[fd]]
+        return events | flags if events else 0
+
+    def update(self, fd):
+        mask = self.event_mask(fd)
+        current = self.registered.get(fd)
+        if mask == current and (mask or fd in self.read_listeners or
+                                fd in self.write_listeners):
+            return
+        if mask and current is None:
+            self.epoll.register(fd, mask)
+            self.registered[fd] = mask
+        elif mask:
+            self.epoll.modify(fd, mask)
+            self.registered[fd] = mask
+        elif current is not None:
+            del self.registered[fd]
+            try:
+                self.epoll.unregister(fd)
+            except OSError:
+                pass
+
+    def select_stream(self, timeout):
+        return self.epoll.poll(-1 if timeout is None else timeout)
+
+    def fired(self, fd):
+        if self.registered.get(fd, 0) & select.EPOLLONESHOT:
+            self.registered[fd] = 0
+        self.update(fd)
+
+    def notify(self, events):
+        self.notify_events(events, READ_EVENTS, WRITE_EVENTS)
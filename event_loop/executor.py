@@ -0,0 +1,41 @@
+import concurrent.futures
+import os
+
+
+MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+class Executions:
+    def __init__(self, call_soon_threadsafe, max_workers=MAX_WORKERS):
+        self.call_soon_threadsafe = call_soon_threadsafe
+        self.max_workers = max_workers
+        self.executor = None
+        self.pending = 0
+
+    def empty(self):
+        return self.pending == 0
+
+    def default_executor(self):
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='event_loop'
+            )
+        return self.executor
+
+    def submit(self, executor, fn, args, callback=None):
+        if executor is None:
+            executor = self.default_executor()
+        future = executor.submit(fn, *args)
+        self.pending += 1
+        future.add_done_callback(
+            lambda future: self.call_soon_threadsafe(
+                lambda: self.complete(future, callback)
+            )
+        )
+        return future
+
+    def complete(self, future, callback):
+        self.pending -= 1
+        if callback is not None:
+            callback(future)
@@ -0,0 +1,45 @@
+import importlib
+import os
+
+
+ENVIRONMENT_VARIABLE = 'EVENT_LOOP_BACKEND'
+BACKENDS = {
+    'libuv': ('event_loop.libuv_loop', 'LibuvLoop'),
+    'libev': ('event_loop.libev_loop', 'LibevLoop'),
+    'epoll': ('event_loop.epoll_loop', 'EpollLoop'),
+    'poll': ('event_loop.poll_loop', 'PollLoop'),
+    'select': ('event_loop.select_loop', 'SelectLoop')
+}
+PREFERENCE = ('libuv', 'libev', 'epoll', 'poll', 'select')
+
+
+def load(name):
+    if name not in BACKENDS:
+        raise ValueError('Unknown event loop backend: %r' % name)
+    module, cls = BACKENDS[name]
+    return getattr(importlib.import_module(module), cls)
+
+
+def available(name):
+    try:
+        load(name)
+    except (ImportError, AttributeError):
+        return False
+    return True
+
+
+def choose(prefer=None):
+    names = os.environ.get(ENVIRONMENT_VARIABLE) or prefer or PREFERENCE
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    for name in names:
+        try:
+            return load(name)
+        except (ImportError, AttributeError):
+            continue
+    raise ImportError('None of the event loop backends is available: %s' %
+                      ', '.join(names))
+
+
+def create_loop(prefer=None, **kwargs):
+    return choose(prefer)(**kwargs)
@@ -0,0 +1,105 @@
+import math
+import time
+
+
+TICK = 'tick'
+TIMER = 'timer'
+IO = 'io'
+SIGNAL = 'signal'
+PHASES = (TICK, TIMER, IO, SIGNAL)
+DURATION_BASE = 0.000001
+DEPTH_BASE = 1
+BUCKETS = 24
+
+
+class Histogram:
+    def __init__(self, base=DURATION_BASE, buckets=BUCKETS):
+        self.base = base
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value < self.base:
+            bucket = 0
+        else:
+            bucket = min(int(math.log2(value / self.base)) + 1,
+                         len(self.counts) - 1)
+        self.counts[bucket] += 1
+
+    def bounds(self):
+        return [self.base * 2 ** bucket for bucket in range(len(self.counts) - 1)]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'buckets': list(zip(self.bounds() + [math.inf], self.counts))
+        }
+
+
+class Instrument:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.iterations = 0
+        self.poll_time = 0.0
+        self.dispatch_time = 0.0
+        self.callbacks = dict.fromkeys(PHASES, 0)
+        self.durations = {phase: Histogram() for phase in PHASES}
+        self.tick_depth = Histogram(DEPTH_BASE)
+        self.timer_depth = Histogram(DEPTH_BASE)
+        self.lateness = Histogram()
+        self.poll_started = None
+
+    def begin_iteration(self, ticks, timers):
+        self.iterations += 1
+        self.tick_depth.add(ticks)
+        self.timer_depth.add(timers)
+
+    def begin_poll(self):
+        self.poll_started = self.clock()
+
+    def end_poll(self):
+        if self.poll_started is not None:
+            self.record_poll(self.poll_started, self.clock() - self.poll_started)
+            self.poll_started = None
+
+    def record_poll(self, start, duration):
+        self.poll_time += duration
+
+    def end_run(self):
+        pass
+
+    def late(self, lateness):
+        self.lateness.add(lateness if lateness > 0 else 0)
+
+    def dispatch(self, kind, source, callback, *args):
+        start = self.clock()
+        try:
+            return callback(*args)
+        finally:
+            self.record(kind, source, callback, start, self.clock() - start)
+
+    def record(self, kind, source, callback, start, duration):
+        self.callbacks[kind] += 1
+        self.durations[kind].add(duration)
+        self.dispatch_time += duration
+
+    def snapshot(self):
+        return {
+            'iterations': self.iterations,
+            'poll_time': self.poll_time,
+            'dispatch_time': self.dispatch_time,
+            'callbacks': dict(self.callbacks),
+            'durations': {phase: histogram.snapshot()
+                          for phase, histogram in self.durations.items()},
+            'tick_depth': self.tick_depth.snapshot(),
+            'timer_depth': self.timer_depth.snapshot(),
+            'lateness': self.lateness.snapshot()
+        }
@@ -1,89 +1,290 @@
 import mood.event as libev
 
+import event_loop.executor
+import event_loop.instrument
+import event_loop.mode
+import event_loop.pool
+import event_loop.server
 import event_loop.tick
 import event_loop.signal
 import event_loop.timer
 
 
+class TimerWatcher:
+    __slots__ = ('loop', 'ev_timer', 'timer', 'deadline')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.ev_timer = loop.ev_loop.timer(0.0, 0.0, self.expire)
+        self.timer = None
+        self.deadline = 0.0
+
+    def start(self, timer, after, repeat):
+        self.timer = timer
+        self.deadline = self.loop.ev_loop.now() + after
+        self.ev_timer.set(after, repeat)
+        self.ev_timer.start()
+
+    def again(self, after, repeat):
+        self.deadline = self.loop.ev_loop.now() + after
+        self.ev_timer.repeat = after
+        self.ev_timer.reset()
+        self.ev_timer.repeat = repeat
+
+    def stop(self):
+        self.ev_timer.stop()
+        self.timer = None
+
+    def expire(self, ev_timer, events):
+        timer = self.timer
+        deadline = self.deadline
+        if timer.periodic:
+            self.deadline += ev_timer.repeat
+        else:
+            self.loop.cancel_timer(timer)
+        instrument = self.loop.instrument
+        if instrument is None:
+            timer.callback()
+        else:
+            instrument.late(self.loop.ev_loop.now() - deadline)
+            instrument.dispatch(event_loop.instrument.TIMER, timer,
+                                timer.callback)
+
+
 class LibevLoop:
-    def __init__(self):
+    modes = event_loop.mode.LEVEL_TRIGGERED
+
+    def __init__(self, slack=0):
+        self.slack = slack
         self.ev_loop = libev.Loop()
+        self.ev_loop.timeout_interval = slack
         self.future_tick_queue = event_loop.tick.FutureTickQueue()
-        self.timers = {}
+        self.active_timers = set()
         self.read_streams = {}
+        self.read_listeners = {}
+        self.read_modes = {}
         self.write_streams = {}
+        self.write_listeners = {}
+        self.write_modes = {}
+        self.disarmed_reads = {}
+        self.disarmed_writes = {}
+        self.ios = {}
+        self.io_pool = event_loop.pool.Pool()
+        self.timer_pool = event_loop.pool.Pool()
         self.running = False
         self.signals = event_loop.signal.Signals()
+        self.executions = event_loop.executor.Executions(
+            self.call_soon_threadsafe
+        )
         self.signal_events = {}
+        self.ev_async = getattr(self.ev_loop, 'async')(lambda *args: None)
+        self.ev_async.start()
+        self.instrument = None
+        self.ev_prepare = self.ev_loop.prepare(self.before_poll)
+        self.ev_check = self.ev_loop.check(self.after_poll)
 
-    def add_read_stream(self, stream, listener):
-        key = hash(stream)
-        if key not in self.read_streams:
-            ev_io = self.ev_loop.io(
-                stream,
-                libev.EV_READ,
-                lambda *args: listener(stream)
-            )
-            ev_io.start()
-            self.read_streams[key] = ev_io
-
-    def add_write_stream(self, stream, listener):
-        key = hash(stream)
-        if key not in self.write_streams:
-            ev_io = self.ev_loop.io(
-                stream,
-                libev.EV_WRITE,
-                lambda *args: listener(stream)
-            )
-            ev_io.start()
-            self.write_streams[key] = ev_io
+    def add_read_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        fd = stream.fileno()
+        if fd == -1 or mode not in self.modes:
+            raise ValueError
+        if fd not in self.read_listeners:
+            self.read_streams[fd] = stream
+            self.read_listeners[fd] = listener
+            self.read_modes[fd] = mode
+            self.update(fd)
+
+    def add_write_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        fd = stream.fileno()
+        if fd == -1 or mode not in self.modes:
+            raise ValueError
+        if fd not in self.write_listeners:
+            self.write_streams[fd] = stream
+            self.write_listeners[fd] = listener
+            self.write_modes[fd] = mode
+            self.update(fd)
 
     def remove_read_stream(self, stream):
-        key = hash(stream)
-        if key in self.read_streams:
-            self.read_streams[key].stop()
-            del self.read_streams[key]
+        fd = self.find_fd(stream, self.read_streams, self.disarmed_reads)
+        if fd in self.read_listeners:
+            self.read_streams.pop(fd, None)
+            self.disarmed_reads.pop(fd, None)
+            del self.read_listeners[fd]
+            del self.read_modes[fd]
+            self.update(fd)
 
     def remove_write_stream(self, stream):
-        key = hash(stream)
-        if key in self.write_streams:
-            self.write_streams[key].stop()
-            del self.write_streams[key]
+        fd = self.find_fd(stream, self.write_streams, self.disarmed_writes)
+        if fd in self.write_listeners:
+            self.write_streams.pop(fd, None)
+            self.disarmed_writes.pop(fd, None)
+            del self.write_listeners[fd]
+            del self.write_modes[fd]
+            self.update(fd)
 
-    def add_timer(self, interval, callback):
-        timer = event_loop.timer.Timer(interval, callback)
+    def rearm_read_stream(self, stream):
+        fd = self.find_fd(stream, self.disarmed_reads)
+        if fd in self.disarmed_reads:
+            self.read_streams[fd] = self.disarmed_reads.pop(fd)
+            self.update(fd)
 
-        def action(*args):
-            nonlocal timer
-            timer.callback()
-            self.cancel_timer(timer)
+    def rearm_write_stream(self, stream):
+        fd = self.find_fd(stream, self.disarmed_writes)
+        if fd in self.disarmed_writes:
+            self.write_streams[fd] = self.disarmed_writes.pop(fd)
+            self.update(fd)
+
+    def find_fd(self, stream, *registries):
+        fd = stream.fileno()
+        if fd != -1:
+            return fd
+        for streams in registries:
+            for fd, registered in streams.items():
+                if registered is stream:
+                    return fd
+        return None
 
-        ev_timer = self.ev_loop.timer(timer.interval, 0.0, action)
-        ev_timer.start()
-        self.timers[hash(timer)] = ev_timer
+    def update(self, fd):
+        events = 0
+        if fd in self.read_streams:
+            events |= libev.EV_READ
+        if fd in self.write_streams:
+            events |= libev.EV_WRITE
+        ev_io = self.ios.get(fd)
+        if events:
+            if ev_io is None:
+                ev_io = self.io_pool.acquire()
+                if ev_io is None:
+                    ev_io = self.ev_loop.io(fd, events, self.io_callback)
+                else:
+                    ev_io.set(fd, events)
+                self.ios[fd] = ev_io
+            elif ev_io.events != events:
+                ev_io.stop()
+                ev_io.set(fd, events)
+            ev_io.start()
+        elif ev_io is not None:
+            ev_io.stop()
+            if fd not in self.read_listeners and fd not in self.write_listeners:
+                self.io_pool.release(self.ios.pop(fd))
+
+    def io_callback(self, ev_io, events):
+        fd = ev_io.fd
+        read_stream = None
+        write_stream = None
+        if events & libev.EV_READ and fd in self.read_streams:
+            read_stream = self.read_streams[fd]
+            if self.read_modes[fd] & event_loop.mode.ONESHOT:
+                self.disarmed_reads[fd] = self.read_streams.pop(fd)
+        if events & libev.EV_WRITE and fd in self.write_streams:
+            write_stream = self.write_streams[fd]
+            if self.write_modes[fd] & event_loop.mode.ONESHOT:
+                self.disarmed_writes[fd] = self.write_streams.pop(fd)
+        if fd in self.disarmed_reads or fd in self.disarmed_writes:
+            self.update(fd)
+        instrument = self.instrument
+        if read_stream is not None and fd in self.read_listeners:
+            if instrument is None:
+                self.read_listeners[fd](read_stream)
+            else:
+                instrument.dispatch(event_loop.instrument.IO, fd,
+                                    self.read_listeners[fd], read_stream)
+        if write_stream is not None and fd in self.write_listeners:
+            if instrument is None:
+                self.write_listeners[fd](write_stream)
+            else:
+                instrument.dispatch(event_loop.instrument.IO, fd,
+                                    self.write_listeners[fd], write_stream)
+
+    def add_timer(self, interval, callback, slack=None):
+        timer = event_loop.timer.Timer(
+            interval,
+            callback,
+            slack=self.slack if slack is None else slack,
+            loop=self
+        )
+        self.start_timer(timer)
         return timer
 
-    def add_periodic_timer(self, interval, callback):
-        timer = event_loop.timer.Timer(interval, callback)
-        key = hash(timer)
-        ev_timer = self.ev_loop.timer(
-            timer.interval,
-            timer.interval,
-            lambda *args: timer.callback()
+    def add_periodic_timer(self, interval, callback, slack=None):
+        timer = event_loop.timer.Timer(
+            interval,
+            callback,
+            periodic=True,
+            slack=self.slack if slack is None else slack,
+            loop=self
         )
-        ev_timer.start()
-        self.timers[key] = ev_timer
+        self.start_timer(timer)
         return timer
 
+    def start_timer(self, timer):
+        watcher = self.timer_pool.acquire()
+        if watcher is None:
+            watcher = TimerWatcher(self)
+        watcher.start(timer, self.timeout(timer), self.repeat(timer))
+        timer.handle = watcher
+        self.active_timers.add(watcher)
+
+    def reschedule_timer(self, timer, interval=None):
+        if interval is not None:
+            timer.interval = max(interval, event_loop.timer.MIN_INTERVAL)
+        watcher = timer.handle
+        if watcher is None:
+            self.start_timer(timer)
+        else:
+            watcher.again(self.timeout(timer), self.repeat(timer))
+
+    def repeat(self, timer):
+        if not timer.periodic:
+            return 0.0
+        return event_loop.timer.coalesce(timer.interval, timer.slack)
+
+    def timeout(self, timer):
+        if timer.slack <= 0:
+            return timer.interval
+        now = self.ev_loop.now()
+        return event_loop.timer.coalesce(now + timer.interval, timer.slack) - now
+
     def cancel_timer(self, timer):
-        key = hash(timer)
-        if key in self.timers:
-            self.timers[key].stop()
-            del self.timers[key]
+        watcher = timer.handle
+        if watcher is not None:
+            timer.handle = None
+            self.active_timers.discard(watcher)
+            watcher.stop()
+            self.timer_pool.release(watcher)
 
     def future_tick(self, listener):
         self.future_tick_queue.add(listener)
 
+    def call_soon_threadsafe(self, listener):
+        self.future_tick_queue.add(listener)
+        self.ev_async.send()
+
+    def run_in_executor(self, executor, fn, *args, callback=None):
+        return self.executions.submit(executor, fn, args, callback)
+
+    def create_server(self, host, port, on_connection,
+                      backlog=event_loop.server.DEFAULT_BACKLOG,
+                      reuse_port=False, batch=event_loop.server.ACCEPT_BATCH):
+        return event_loop.server.create_server(self, host, port, on_connection,
+                                               backlog, reuse_port, batch)
+
+    def set_instrument(self, instrument):
+        self.instrument = instrument
+        self.future_tick_queue.instrument = instrument
+        self.signals.instrument = instrument
+        if instrument is None:
+            self.ev_prepare.stop()
+            self.ev_check.stop()
+        else:
+            self.ev_prepare.start()
+            self.ev_check.start()
+
+    def before_poll(self, ev_prepare, events):
+        self.instrument.begin_poll()
+
+    def after_poll(self, ev_check, events):
+        self.instrument.end_poll()
+
     def stop(self):
         self.running = False
 
@@ -112,14 +313,18 @@ class LibevLoop:
     def run(self):
         self.running = True
         while self.running:
+            if self.instrument is not None:
+                self.instrument.begin_iteration(len(self.future_tick_queue),
+                                                len(self.active_timers))
             self.future_tick_queue.tick()
 
             has_pending_callbacks = not self.future_tick_queue.empty()
             was_just_stopped = not self.running
             nothing_left_to_do = (not self.read_streams and
                                   not self.write_streams and
-                                  not self.timers and
-                                  self.signals.empty())
+                                  not self.active_timers and
+                                  self.signals.empty() and
+                                  self.executions.empty())
 
             if was_just_stopped or has_pending_callbacks:
                 self.ev_loop.start(libev.EVRUN_NOWAIT)
@@ -127,3 +332,5 @@ class LibevLoop:
                 break
             else:
                 self.ev_loop.start(libev.EVRUN_ONCE)
+        if self.instrument is not None:
+            self.instrument.end_run()
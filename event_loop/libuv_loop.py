@@ -1,89 +1,302 @@
 import pyuv as libuv
 
+import event_loop.executor
+import event_loop.instrument
+import event_loop.mode
+import event_loop.pool
+import event_loop.server
 import event_loop.tick
 import event_loop.signal
 import event_loop.timer
 
 
 SUB_MS_ACCURACY = 10e-4
+MILLISECONDS_PER_SECOND = 1000
+
+
+class TimerWatcher:
+    __slots__ = ('loop', 'uv_timer', 'timer', 'callback', 'deadline')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.uv_timer = libuv.Timer(loop.uv_loop)
+        self.timer = None
+        self.callback = self.expire
+        self.deadline = 0.0
+
+    def start(self, timer, timeout, repeat):
+        self.timer = timer
+        self.deadline = self.loop.now() + timeout
+        self.uv_timer.start(self.callback, timeout, repeat)
+
+    def again(self, timeout, repeat):
+        self.deadline = self.loop.now() + timeout
+        self.uv_timer.repeat = timeout
+        self.uv_timer.again()
+        self.uv_timer.repeat = repeat
+
+    def stop(self):
+        self.uv_timer.stop()
+        self.timer = None
+
+    def expire(self, uv_timer):
+        timer = self.timer
+        deadline = self.deadline
+        if timer.periodic:
+            self.deadline += uv_timer.repeat
+        else:
+            self.loop.cancel_timer(timer)
+        instrument = self.loop.instrument
+        if instrument is None:
+            timer.callback()
+        else:
+            instrument.late(self.loop.now() - deadline)
+            instrument.dispatch(event_loop.instrument.TIMER, timer,
+                                timer.callback)
 
 
 class LibuvLoop:
-    def __init__(self):
+    modes = event_loop.mode.LEVEL_TRIGGERED
+
+    def __init__(self, slack=0):
+        self.slack = slack
         self.uv_loop = libuv.Loop()
         self.future_tick_queue = event_loop.tick.FutureTickQueue()
-        self.timers = {}
+        self.timer_count = 0
         self.read_streams = {}
+        self.read_listeners = {}
+        self.read_modes = {}
         self.write_streams = {}
+        self.write_listeners = {}
+        self.write_modes = {}
+        self.disarmed_reads = {}
+        self.disarmed_writes = {}
+        self.polls = {}
+        self.idle_polls = {}
+        self.timer_pool = event_loop.pool.Pool()
+        self.poll_callback = self.dispatch
         self.running = False
         self.signals = event_loop.signal.Signals()
+        self.executions = event_loop.executor.Executions(
+            self.call_soon_threadsafe
+        )
         self.signal_events = {}
+        self.uv_async = libuv.Async(self.uv_loop, lambda *args: None)
+        self.instrument = None
+        self.uv_prepare = libuv.Prepare(self.uv_loop)
+        self.uv_prepare.ref = False
+        self.uv_check = libuv.Check(self.uv_loop)
+        self.uv_check.ref = False
 
-    def add_read_stream(self, stream, listener):
-        key = hash(stream)
-        if key not in self.read_streams:
-            uv_poll = libuv.Poll(self.uv_loop, stream.fileno())
-            uv_poll.start(libuv.UV_READABLE, lambda *args: listener(stream))
-            self.read_streams[key] = uv_poll
+    def add_read_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        fd = stream.fileno()
+        if fd == -1 or mode not in self.modes:
+            raise ValueError
+        if fd not in self.read_listeners:
+            self.read_streams[fd] = stream
+            self.read_listeners[fd] = listener
+            self.read_modes[fd] = mode
+            self.update(fd)
 
-    def add_write_stream(self, stream, listener):
-        key = hash(stream)
-        if key not in self.write_streams:
-            uv_poll = libuv.Poll(self.uv_loop, stream.fileno())
-            uv_poll.start(libuv.UV_WRITABLE, lambda *args: listener(stream))
-            self.write_streams[key] = uv_poll
+    def add_write_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        fd = stream.fileno()
+        if fd == -1 or mode not in self.modes:
+            raise ValueError
+        if fd not in self.write_listeners:
+            self.write_streams[fd] = stream
+            self.write_listeners[fd] = listener
+            self.write_modes[fd] = mode
+            self.update(fd)
 
     def remove_read_stream(self, stream):
-        key = hash(stream)
-        if key in self.read_streams:
-            self.read_streams[key].stop()
-            del self.read_streams[key]
+        fd = self.find_fd(stream, self.read_streams, self.disarmed_reads)
+        if fd in self.read_listeners:
+            self.read_streams.pop(fd, None)
+            self.disarmed_reads.pop(fd, None)
+            del self.read_listeners[fd]
+            del self.read_modes[fd]
+            self.update(fd)
 
     def remove_write_stream(self, stream):
-        key = hash(stream)
-        if key in self.write_streams:
-            self.write_streams[key].stop()
-            del self.write_streams[key]
+        fd = self.find_fd(stream, self.write_streams, self.disarmed_writes)
+        if fd in self.write_listeners:
+            self.write_streams.pop(fd, None)
+            self.disarmed_writes.pop(fd, None)
+            del self.write_listeners[fd]
+            del self.write_modes[fd]
+            self.update(fd)
+
+    def rearm_read_stream(self, stream):
+        fd = self.find_fd(stream, self.disarmed_reads)
+        if fd in self.disarmed_reads:
+            self.read_streams[fd] = self.disarmed_reads.pop(fd)
+            self.update(fd)
+
+    def rearm_write_stream(self, stream):
+        fd = self.find_fd(stream, self.disarmed_writes)
+        if fd in self.disarmed_writes:
+            self.write_streams[fd] = self.disarmed_writes.pop(fd)
+            self.update(fd)
 
-    def add_timer(self, interval, callback):
+    def find_fd(self, stream, *registries):
+        fd = stream.fileno()
+        if fd != -1:
+            return fd
+        for streams in registries:
+            for fd, registered in streams.items():
+                if registered is stream:
+                    return fd
+        return None
+
+    def update(self, fd):
+        events = 0
+        if fd in self.read_streams:
+            events |= libuv.UV_READABLE
+        if fd in self.write_streams:
+            events |= libuv.UV_WRITABLE
+        uv_poll = self.polls.get(fd)
+        if events:
+            if uv_poll is None:
+                uv_poll = self.idle_polls.pop(fd, None)
+                if uv_poll is None:
+                    uv_poll = libuv.Poll(self.uv_loop, fd)
+                self.polls[fd] = uv_poll
+            uv_poll.start(events, self.poll_callback)
+        elif uv_poll is not None:
+            uv_poll.stop()
+            if fd not in self.read_listeners and fd not in self.write_listeners:
+                del self.polls[fd]
+                if len(self.idle_polls) < event_loop.pool.POOL_SIZE:
+                    self.idle_polls[fd] = uv_poll
+                else:
+                    uv_poll.close()
+
+    def dispatch(self, uv_poll, events, error):
+        fd = uv_poll.fileno()
+        if error:
+            events |= libuv.UV_READABLE | libuv.UV_WRITABLE
+        read_stream = None
+        write_stream = None
+        if events & libuv.UV_READABLE and fd in self.read_streams:
+            read_stream = self.read_streams[fd]
+            if self.read_modes[fd] & event_loop.mode.ONESHOT:
+                self.disarmed_reads[fd] = self.read_streams.pop(fd)
+        if events & libuv.UV_WRITABLE and fd in self.write_streams:
+            write_stream = self.write_streams[fd]
+            if self.write_modes[fd] & event_loop.mode.ONESHOT:
+                self.disarmed_writes[fd] = self.write_streams.pop(fd)
+        if fd in self.disarmed_reads or fd in self.disarmed_writes:
+            self.update(fd)
+        instrument = self.instrument
+        if read_stream is not None and fd in self.read_listeners:
+            if instrument is None:
+                self.read_listeners[fd](read_stream)
+            else:
+                instrument.dispatch(event_loop.instrument.IO, fd,
+                                    self.read_listeners[fd], read_stream)
+        if write_stream is not None and fd in self.write_listeners:
+            if instrument is None:
+                self.write_listeners[fd](write_stream)
+            else:
+                instrument.dispatch(event_loop.instrument.IO, fd,
+                                    self.write_listeners[fd], write_stream)
+
+    def add_timer(self, interval, callback, slack=None):
         timer = event_loop.timer.Timer(
             interval if interval > SUB_MS_ACCURACY else SUB_MS_ACCURACY,
             callback,
-            periodic=False
+            periodic=False,
+            slack=self.slack if slack is None else slack,
+            loop=self
         )
-
-        def action(*args):
-            nonlocal timer
-            timer.callback()
-            self.cancel_timer(timer)
-
-        uv_timer = libuv.Timer(self.uv_loop)
-        uv_timer.start(action, timer.interval, 0.0)
-        self.timers[hash(timer)] = uv_timer
+        self.start_timer(timer)
         return timer
 
-    def add_periodic_timer(self, interval, callback):
+    def add_periodic_timer(self, interval, callback, slack=None):
         timer = event_loop.timer.Timer(
             interval if interval > SUB_MS_ACCURACY else SUB_MS_ACCURACY,
             callback,
-            periodic=True
+            periodic=True,
+            slack=self.slack if slack is None else slack,
+            loop=self
         )
-        uv_timer = libuv.Timer(self.uv_loop)
-        uv_timer.start(lambda *args: timer.callback(),
-                       timer.interval,
-                       timer.interval)
-        self.timers[hash(timer)] = uv_timer
+        self.start_timer(timer)
         return timer
 
+    def start_timer(self, timer):
+        watcher = self.timer_pool.acquire()
+        if watcher is None:
+            watcher = TimerWatcher(self)
+        watcher.start(timer, self.timeout(timer), self.repeat(timer))
+        timer.handle = watcher
+        self.timer_count += 1
+
+    def reschedule_timer(self, timer, interval=None):
+        if interval is not None:
+            timer.interval = (interval if interval > SUB_MS_ACCURACY
+                              else SUB_MS_ACCURACY)
+        watcher = timer.handle
+        if watcher is None:
+            self.start_timer(timer)
+        else:
+            watcher.again(self.timeout(timer), self.repeat(timer))
+
+    def repeat(self, timer):
+        if not timer.periodic:
+            return 0.0
+        return event_loop.timer.coalesce(timer.interval, timer.slack)
+
+    def timeout(self, timer):
+        if timer.slack <= 0:
+            return timer.interval
+        now = self.now()
+        timeout = event_loop.timer.coalesce(now + timer.interval, timer.slack)
+        return max(timeout - now, SUB_MS_ACCURACY)
+
     def cancel_timer(self, timer):
-        key = hash(timer)
-        if key in self.timers:
-            self.timers[key].stop()
-            del self.timers[key]
+        watcher = timer.handle
+        if watcher is not None:
+            timer.handle = None
+            self.timer_count -= 1
+            watcher.stop()
+            self.timer_pool.release(watcher)
 
     def future_tick(self, listener):
         self.future_tick_queue.add(listener)
 
+    def call_soon_threadsafe(self, listener):
+        self.future_tick_queue.add(listener)
+        self.uv_async.send()
+
+    def run_in_executor(self, executor, fn, *args, callback=None):
+        return self.executions.submit(executor, fn, args, callback)
+
+    def create_server(self, host, port, on_connection,
+                      backlog=event_loop.server.DEFAULT_BACKLOG,
+                      reuse_port=False, batch=event_loop.server.ACCEPT_BATCH):
+        return event_loop.server.create_server(self, host, port, on_connection,
+                                               backlog, reuse_port, batch)
+
+    def now(self):
+        return self.uv_loop.now() / MILLISECONDS_PER_SECOND
+
+    def set_instrument(self, instrument):
+        self.instrument = instrument
+        self.future_tick_queue.instrument = instrument
+        self.signals.instrument = instrument
+        if instrument is None:
+            self.uv_prepare.stop()
+            self.uv_check.stop()
+        else:
+            self.uv_prepare.start(self.before_poll)
+            self.uv_check.start(self.after_poll)
+
+    def before_poll(self, uv_prepare):
+        self.instrument.begin_poll()
+
+    def after_poll(self, uv_check):
+        self.instrument.end_poll()
+
     def stop(self):
         self.running = False
 
@@ -112,18 +325,25 @@ class LibuvLoop:
     def run(self):
         self.running = True
         while self.running:
+            if self.instrument is not None:
+                self.instrument.begin_iteration(len(self.future_tick_queue),
+                                                self.timer_count)
             self.future_tick_queue.tick()
 
             has_pending_callbacks = not self.future_tick_queue.empty()
             was_just_stopped = not self.running
             nothing_left_to_do = (not self.read_streams and
                                   not self.write_streams and
-                                  not self.timers and
-                                  self.signals.empty())
+                                  not self.timer_count and
+                                  self.signals.empty() and
+                                  self.executions.empty())
 
             if was_just_stopped or has_pending_callbacks:
                 self.uv_loop.run(libuv.UV_RUN_NOWAIT)
             elif nothing_left_to_do:
                 break
             else:
+                self.uv_async.ref = not self.executions.empty()
                 self.uv_loop.run(libuv.UV_RUN_ONCE)
+        if self.instrument is not None:
+            self.instrument.end_run()
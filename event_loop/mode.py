@@ -0,0 +1,6 @@
+LEVEL = 0
+EDGE = 1
+ONESHOT = 2
+
+LEVEL_TRIGGERED = frozenset([LEVEL, ONESHOT])
+ALL = frozenset([LEVEL, EDGE, ONESHOT, EDGE | ONESHOT])
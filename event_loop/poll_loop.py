@@ -0,0 +1,54 @@
+import errno
+import os
+import select
+
+import event_loop.select_loop
+
+
+READ_EVENTS = select.POLLIN | select.POLLHUP | select.POLLERR
+WRITE_EVENTS = select.POLLOUT | select.POLLHUP | select.POLLERR
+MILLISECONDS_PER_SECOND = 1000
+
+
+class PollLoop(event_loop.select_loop.SelectLoop):
+    def __init__(self, timers=None, slack=0):
+        super().__init__(timers, slack)
+        self.poll = select.poll()
+        self.registered = {}
+        self.poll.register(self.waker.fileno(), select.POLLIN)
+
+    def event_mask(self, fd):
+        events = 0
+        if fd in self.read_streams:
+            events |= select.POLLIN
+        if fd in self.write_streams:
+            events |= select.POLLOUT
+        return events
+
+    def update(self, fd):
+        mask = self.event_mask(fd)
+        current = self.registered.get(fd, 0)
+        if mask == current:
+            return
+        if not current:
+            self.poll.register(fd, mask)
+            self.registered[fd] = mask
+        elif mask:
+            self.poll.modify(fd, mask)
+            self.registered[fd] = mask
+        else:
+            del self.registered[fd]
+            self.poll.unregister(fd)
+
+    def select_stream(self, timeout):
+        if timeout is None:
+            events = self.poll.poll()
+        else:
+            events = self.poll.poll(timeout * MILLISECONDS_PER_SECOND)
+        for _, mask in events:
+            if mask & select.POLLNVAL:
+                raise OSError(errno.EBADF, os.strerror(errno.EBADF))
+        return events
+
+    def notify(self, events):
+        self.notify_events(events, READ_EVENTS, WRITE_EVENTS)
@@ -0,0 +1,19 @@
+POOL_SIZE = 1024
+
+
+class Pool:
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def acquire(self):
+        return self.items.pop() if self.items else None
+
+    def release(self, item):
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return True
+        return False
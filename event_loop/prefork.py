@@ -0,0 +1,314 @@
+import functools
+import json
+import os
+import resource
+import signal
+import sys
+import time
+import traceback
+
+import event_loop.factory
+import event_loop.instrument
+import event_loop.server
+
+
+DRAIN_TIMEOUT = 30
+STATS_INTERVAL = 1.0
+MIN_UPTIME = 1.0
+RESTART_DELAY = 1.0
+READ_SIZE = 2 ** 16
+WORKER_SIGNALS = (signal.SIGTERM, signal.SIGHUP, signal.SIGINT, signal.SIGCHLD)
+
+
+class Worker:
+    def __init__(self, id):
+        self.id = id
+        self.pid = None
+        self.started = None
+        self.restarts = 0
+        self.exit_status = None
+        self.stats = {}
+        self.reader = None
+        self.pending = b''
+
+    def snapshot(self):
+        snapshot = {'pid': self.pid}
+        snapshot.update(self.stats)
+        snapshot.update(id=self.id, restarts=self.restarts,
+                        exit_status=self.exit_status)
+        return snapshot
+
+
+class Supervisor:
+    def __init__(self, on_connection, host, port, workers=None, backend=None,
+                 reuse_port=False, backlog=event_loop.server.DEFAULT_BACKLOG,
+                 on_start=None, on_drain=None, on_stats=None,
+                 drain_timeout=DRAIN_TIMEOUT, stats_interval=STATS_INTERVAL,
+                 instrument=False):
+        if reuse_port and not port:
+            raise ValueError
+        self.on_connection = on_connection
+        self.host = host
+        self.port = port
+        self.workers = [Worker(id) for id in range(workers or os.cpu_count())]
+        self.backend = backend
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+        self.on_start = on_start
+        self.on_drain = on_drain
+        self.on_stats = on_stats
+        self.drain_timeout = drain_timeout
+        self.stats_interval = stats_interval
+        self.instrument = instrument
+        self.sock = None
+        self.loop = None
+        self.kill_timer = None
+        self.retired = {}
+        self.stopping = False
+
+    def run(self):
+        if not self.reuse_port:
+            self.sock = event_loop.server.bind(self.host, self.port,
+                                               self.backlog)
+        self.loop = event_loop.factory.create_loop(self.backend)
+        self.loop.add_signal(signal.SIGCHLD, self.reap)
+        self.loop.add_signal(signal.SIGTERM, self.stop)
+        self.loop.add_signal(signal.SIGINT, self.stop)
+        self.loop.add_signal(signal.SIGHUP, self.reload)
+        for worker in self.workers:
+            self.spawn(worker)
+        try:
+            self.loop.run()
+        finally:
+            if self.sock is not None:
+                self.sock.close()
+
+    def stats(self):
+        return [worker.snapshot() for worker in self.workers]
+
+    def spawn(self, worker):
+        if self.stopping:
+            return
+        reader, writer = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(reader)
+            self.run_worker(worker, writer)
+        os.close(writer)
+        worker.pid = pid
+        worker.started = time.monotonic()
+        worker.exit_status = None
+        worker.pending = b''
+        worker.reader = open(reader, 'rb', buffering=0)
+        self.loop.add_read_stream(worker.reader,
+                                  functools.partial(self.read_stats, worker))
+
+    def run_worker(self, worker, writer):
+        code = 0
+        try:
+            self.release_signals()
+            for signum in WORKER_SIGNALS:
+                signal.signal(signum, signal.SIG_DFL)
+            for other in self.workers:
+                if other.reader is not None:
+                    other.reader.close()
+            WorkerProcess(self, worker, writer).run()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def read_stats(self, worker, reader):
+        data = reader.read(READ_SIZE)
+        if not data:
+            self.loop.remove_read_stream(reader)
+            reader.close()
+            if worker.reader is reader:
+                worker.reader = None
+            return
+        *lines, worker.pending = (worker.pending + data).split(b'\n')
+        for line in lines:
+            worker.stats = json.loads(line)
+            if self.on_stats is not None:
+                self.on_stats(worker.snapshot())
+
+    def find_worker(self, pid):
+        for worker in self.workers:
+            if worker.pid == pid:
+                return worker
+        return None
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            if pid in self.retired:
+                timer = self.retired.pop(pid)
+                if timer is not None:
+                    self.loop.cancel_timer(timer)
+                continue
+            worker = self.find_worker(pid)
+            if worker is None:
+                continue
+            uptime = time.monotonic() - worker.started
+            worker.pid = None
+            worker.exit_status = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+            worker.restarts += 1
+            if uptime < MIN_UPTIME:
+                self.loop.add_timer(RESTART_DELAY,
+                                    functools.partial(self.spawn, worker))
+            else:
+                self.spawn(worker)
+        if self.stopping and not self.alive() and not self.retired:
+            self.finish()
+
+    def alive(self):
+        return [worker for worker in self.workers if worker.pid is not None]
+
+    def send(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def forward(self, signum):
+        for worker in self.alive():
+            self.send(worker.pid, signum)
+
+    def reload(self):
+        if self.stopping:
+            return
+        for worker in self.alive():
+            pid = worker.pid
+            if worker.reader is not None:
+                self.loop.remove_read_stream(worker.reader)
+                worker.reader.close()
+                worker.reader = None
+            self.spawn(worker)
+            self.retire(pid)
+
+    def retire(self, pid):
+        self.retired[pid] = self.loop.add_timer(
+            self.drain_timeout, functools.partial(self.kill_retired, pid)
+        )
+        self.send(pid, signal.SIGHUP)
+
+    def kill_retired(self, pid):
+        self.retired[pid] = None
+        self.send(pid, signal.SIGKILL)
+
+    def stop(self):
+        if self.stopping:
+            return
+        self.stopping = True
+        self.forward(signal.SIGTERM)
+        if self.alive() or self.retired:
+            self.kill_timer = self.loop.add_timer(self.drain_timeout, self.kill)
+        else:
+            self.finish()
+
+    def kill(self):
+        self.kill_timer = None
+        self.forward(signal.SIGKILL)
+        for pid, timer in self.retired.items():
+            if timer is not None:
+                self.loop.cancel_timer(timer)
+            self.kill_retired(pid)
+
+    def finish(self):
+        if self.kill_timer is not None:
+            self.loop.cancel_timer(self.kill_timer)
+            self.kill_timer = None
+        self.release_signals()
+
+    def release_signals(self):
+        self.loop.remove_signal(signal.SIGCHLD, self.reap)
+        self.loop.remove_signal(signal.SIGTERM, self.stop)
+        self.loop.remove_signal(signal.SIGINT, self.stop)
+        self.loop.remove_signal(signal.SIGHUP, self.reload)
+
+
+class WorkerProcess:
+    def __init__(self, supervisor, worker, writer):
+        self.supervisor = supervisor
+        self.worker = worker
+        self.writer = writer
+        os.set_blocking(writer, False)
+        self.loop = event_loop.factory.create_loop(supervisor.backend)
+        self.instrument = None
+        if supervisor.instrument:
+            self.instrument = event_loop.instrument.Instrument()
+            self.loop.set_instrument(self.instrument)
+        if supervisor.reuse_port:
+            sock = event_loop.server.bind(supervisor.host, supervisor.port,
+                                          supervisor.backlog, True)
+        else:
+            sock = supervisor.sock
+        self.server = event_loop.server.serve(
+            self.loop, sock,
+            functools.partial(supervisor.on_connection, self.loop)
+        )
+        self.stats_timer = None
+        self.draining = False
+
+    def run(self):
+        self.loop.add_signal(signal.SIGTERM, self.drain)
+        self.loop.add_signal(signal.SIGHUP, self.drain)
+        self.loop.add_signal(signal.SIGINT, self.drain)
+        self.stats_timer = self.loop.add_periodic_timer(
+            self.supervisor.stats_interval, self.report
+        )
+        if self.supervisor.on_start is not None:
+            self.supervisor.on_start(self.loop)
+        self.report()
+        self.loop.run()
+        self.report()
+        os.close(self.writer)
+
+    def drain(self):
+        if self.draining:
+            return
+        self.draining = True
+        self.loop.remove_signal(signal.SIGTERM, self.drain)
+        self.loop.remove_signal(signal.SIGHUP, self.drain)
+        self.loop.remove_signal(signal.SIGINT, self.drain)
+        self.loop.cancel_timer(self.stats_timer)
+        self.server.stop()
+        self.server.sock.close()
+        if self.supervisor.on_drain is not None:
+            self.supervisor.on_drain(self.loop)
+
+    def report(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        stats = {
+            'pid': os.getpid(),
+            'accepted': self.server.accepted,
+            'draining': self.draining,
+            'cpu_user': usage.ru_utime,
+            'cpu_system': usage.ru_stime,
+            'max_rss': usage.ru_maxrss
+        }
+        if self.instrument is not None:
+            stats['iterations'] = self.instrument.iterations
+            stats['poll_time'] = self.instrument.poll_time
+            stats['dispatch_time'] = self.instrument.dispatch_time
+            stats['callbacks'] = self.instrument.callbacks
+        try:
+            os.write(self.writer, json.dumps(stats).encode() + b'\n')
+        except (BlockingIOError, BrokenPipeError):
+            pass
+
+
+def run(on_connection, host, port, workers=None, **kwargs):
+    supervisor = Supervisor(on_connection, host, port, workers, **kwargs)
+    supervisor.run()
+    return supervisor
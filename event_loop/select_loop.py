@@ -1,72 +1,159 @@
 import select
 import signal
-import time
 
+import event_loop.executor
+import event_loop.instrument
+import event_loop.mode
+import event_loop.server
 import event_loop.tick
 import event_loop.timer
 import event_loop.signal
+import event_loop.waker
 
 
-MICROSECONDS_PER_SECOND = 10 ** 6
-MAX_TIMEOUT = int(2 ** 63 / 10 ** 9)
+MAX_TIMEOUT = (2 ** 31 - 1) // 1000
 
 
 class SelectLoop:
-    def __init__(self):
+    modes = event_loop.mode.LEVEL_TRIGGERED
+
+    def __init__(self, timers=None, slack=0):
+        self.slack = slack
         self.future_tick_queue = event_loop.tick.FutureTickQueue()
-        self.timers = event_loop.timer.Timers()
-        self.read_streams = []
+        self.timers = event_loop.timer.Timers() if timers is None else timers
+        self.read_streams = {}
         self.read_listeners = {}
-        self.write_streams = []
+        self.read_modes = {}
+        self.write_streams = {}
         self.write_listeners = {}
+        self.write_modes = {}
+        self.disarmed_reads = {}
+        self.disarmed_writes = {}
         self.running = False
         self.signals = event_loop.signal.Signals()
+        self.executions = event_loop.executor.Executions(
+            self.call_soon_threadsafe
+        )
         self.pcntl_signals = []
+        self.waker = event_loop.waker.Waker()
+        self.instrument = None
 
-    def add_read_stream(self, stream, listener):
-        if stream.fileno() == -1:
+    def add_read_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        fd = stream.fileno()
+        if fd == -1 or mode not in self.modes:
             raise ValueError
-        key = hash(stream)
-        if key not in self.read_listeners:
-            self.read_streams.append(stream)
-            self.read_listeners[key] = listener
+        if fd not in self.read_listeners:
+            self.read_streams[fd] = stream
+            self.read_listeners[fd] = listener
+            self.read_modes[fd] = mode
+            self.update(fd)
 
-    def add_write_stream(self, stream, listener):
-        if stream.fileno() == -1:
+    def add_write_stream(self, stream, listener, mode=event_loop.mode.LEVEL):
+        fd = stream.fileno()
+        if fd == -1 or mode not in self.modes:
             raise ValueError
-        key = hash(stream)
-        if key not in self.write_listeners:
-            self.write_streams.append(stream)
-            self.write_listeners[key] = listener
+        if fd not in self.write_listeners:
+            self.write_streams[fd] = stream
+            self.write_listeners[fd] = listener
+            self.write_modes[fd] = mode
+            self.update(fd)
 
     def remove_read_stream(self, stream):
-        key = hash(stream)
-        if key in self.read_listeners:
-            self.read_streams.remove(stream)
-            del self.read_listeners[key]
+        fd = self.find_fd(stream, self.read_streams, self.disarmed_reads)
+        if fd in self.read_listeners:
+            self.read_streams.pop(fd, None)
+            self.disarmed_reads.pop(fd, None)
+            del self.read_listeners[fd]
+            del self.read_modes[fd]
+            self.update(fd)
 
     def remove_write_stream(self, stream):
-        key = hash(stream)
-        if key in self.write_listeners:
-            self.write_streams.remove(stream)
-            del self.write_listeners[key]
+        fd = self.find_fd(stream, self.write_streams, self.disarmed_writes)
+        if fd in self.write_listeners:
+            self.write_streams.pop(fd, None)
+            self.disarmed_writes.pop(fd, None)
+            del self.write_listeners[fd]
+            del self.write_modes[fd]
+            self.update(fd)
+
+    def rearm_read_stream(self, stream):
+        fd = self.find_fd(stream, self.disarmed_reads)
+        if fd in self.disarmed_reads:
+            self.read_streams[fd] = self.disarmed_reads.pop(fd)
+            self.update(fd)
+
+    def rearm_write_stream(self, stream):
+        fd = self.find_fd(stream, self.disarmed_writes)
+        if fd in self.disarmed_writes:
+            self.write_streams[fd] = self.disarmed_writes.pop(fd)
+            self.update(fd)
+
+    def find_fd(self, stream, *registries):
+        fd = stream.fileno()
+        if fd != -1:
+            return fd
+        for streams in registries:
+            for fd, registered in streams.items():
+                if registered is stream:
+                    return fd
+        return None
+
+    def update(self, fd):
+        pass
 
-    def add_timer(self, interval, callback):
-        timer = event_loop.timer.Timer(interval, callback, periodic=False)
+    def fired(self, fd):
+        self.update(fd)
+
+    def add_timer(self, interval, callback, slack=None):
+        timer = event_loop.timer.Timer(
+            interval,
+            callback,
+            periodic=False,
+            slack=self.slack if slack is None else slack,
+            loop=self
+        )
         self.timers.add(timer)
         return timer
 
-    def add_periodic_timer(self, interval, callback):
-        timer = event_loop.timer.Timer(interval, callback, periodic=True)
+    def add_periodic_timer(self, interval, callback, slack=None):
+        timer = event_loop.timer.Timer(
+            interval,
+            callback,
+            periodic=True,
+            slack=self.slack if slack is None else slack,
+            loop=self
+        )
         self.timers.add(timer)
         return timer
 
+    def reschedule_timer(self, timer, interval=None):
+        if interval is not None:
+            timer.interval = max(interval, event_loop.timer.MIN_INTERVAL)
+        self.timers.reschedule(timer)
+
     def cancel_timer(self, timer):
         return self.timers.cancel(timer)
 
     def future_tick(self, listener):
         self.future_tick_queue.add(listener)
 
+    def call_soon_threadsafe(self, listener):
+        self.future_tick_queue.add(listener)
+        self.waker.wake()
+
+    def run_in_executor(self, executor, fn, *args, callback=None):
+        return self.executions.submit(executor, fn, args, callback)
+
+    def create_server(self, host, port, on_connection,
+                      backlog=event_loop.server.DEFAULT_BACKLOG,
+                      reuse_port=False, batch=event_loop.server.ACCEPT_BATCH):
+        return event_loop.server.create_server(self, host, port, on_connection,
+                                               backlog, reuse_port, batch)
+
+    def pcntl_signal(self, signum):
+        self.pcntl_signals.append(signum)
+        self.waker.wake()
+
     def pcntl_signal_dispatch(self):
         for signum in self.pcntl_signals:
             self.signals.call(signum)
@@ -77,7 +164,7 @@ class SelectLoop:
         if self.signals.count(signum) == 1:
             signal.signal(
                 signum,
-                lambda *args: self.pcntl_signals.append(signum)
+                lambda *args: self.pcntl_signal(signum)
             )
 
     def remove_signal(self, signum, listener):
@@ -87,6 +174,12 @@ class SelectLoop:
         if not self.signals.count(signum):
             signal.signal(signum, signal.SIG_DFL)
 
+    def set_instrument(self, instrument):
+        self.instrument = instrument
+        self.future_tick_queue.instrument = instrument
+        self.timers.instrument = instrument
+        self.signals.instrument = instrument
+
     def stop(self):
         self.running = False
 
@@ -97,6 +190,9 @@ class SelectLoop:
     def run(self):
         self.running = True
         while self.running:
+            if self.instrument is not None:
+                self.instrument.begin_iteration(len(self.future_tick_queue),
+                                                self.timers.count)
             self.future_tick_queue.tick()
             self.timers.tick()
             self.pcntl_signal_dispatch()
@@ -106,36 +202,44 @@ class SelectLoop:
             has_pending_timer = self.timers.get_first()
             has_pending_io = self.read_streams or self.write_streams
             has_pending_signals = not self.signals.empty()
+            has_pending_executions = not self.executions.empty()
 
             if was_just_stopped or has_pending_callbacks:
-                self.notify(self.select_stream(timeout=0))
+                self.poll_streams(timeout=0)
             elif has_pending_timer:
                 self.wait_for_timers(has_pending_timer)
-            elif has_pending_io:
-                self.notify(self.select_stream(timeout=None))
-            elif has_pending_signals:
-                signal.pause()
+            elif (has_pending_io or has_pending_signals or
+                  has_pending_executions):
+                self.poll_streams(timeout=None)
             else:
                 break
+        if self.instrument is not None:
+            self.instrument.end_run()
 
     def wait_for_timers(self, pending_timer):
         scheduled_at, _ = pending_timer
-        timeout = self.time_to_sleep(scheduled_at - self.timers.get_time())
-        if self.read_streams or self.write_streams:
-            self.notify(self.select_stream(timeout=timeout))
-        else:
-            time.sleep(timeout)
+        timeout = self.time_to_sleep(scheduled_at - self.timers.update_time())
+        self.poll_streams(timeout=timeout)
 
     def time_to_sleep(self, timeout):
         if timeout < 0:
             return 0
-        timeout /= MICROSECONDS_PER_SECOND
         return MAX_TIMEOUT if timeout > MAX_TIMEOUT else timeout
 
+    def poll_streams(self, timeout):
+        instrument = self.instrument
+        if instrument is None:
+            self.notify(self.select_stream(timeout))
+            return
+        instrument.begin_poll()
+        events = self.select_stream(timeout)
+        instrument.end_poll()
+        self.notify(events)
+
     def select_stream(self, timeout):
         return select.select(
-            self.read_streams,
-            self.write_streams,
+            [*self.read_streams, self.waker.fileno()],
+            [*self.write_streams],
             [],
             timeout
         )
@@ -143,9 +247,65 @@ class SelectLoop:
     def notify(self, streams):
         if streams:
             ready_to_read, ready_to_write, _ = streams
-            for stream in ready_to_read:
-                listener = self.read_listeners[hash(stream)]
-                listener(stream)
-            for stream in ready_to_write:
-                listener = self.write_listeners[hash(stream)]
-                listener(stream)
+            instrument = self.instrument
+            for fd in ready_to_read:
+                if fd == self.waker.fileno():
+                    self.waker.drain()
+                    continue
+                stream = self.read_streams.get(fd)
+                if stream is None:
+                    continue
+                if self.read_modes[fd] & event_loop.mode.ONESHOT:
+                    self.disarmed_reads[fd] = self.read_streams.pop(fd)
+                if instrument is None:
+                    self.read_listeners[fd](stream)
+                else:
+                    instrument.dispatch(event_loop.instrument.IO, fd,
+                                        self.read_listeners[fd], stream)
+            for fd in ready_to_write:
+                stream = self.write_streams.get(fd)
+                if stream is None:
+                    continue
+                if self.write_modes[fd] & event_loop.mode.ONESHOT:
+                    self.disarmed_writes[fd] = self.write_streams.pop(fd)
+                if instrument is None:
+                    self.write_listeners[fd](stream)
+                else:
+                    instrument.dispatch(event_loop.instrument.IO, fd,
+                                        self.write_listeners[fd], stream)
+
+    def notify_events(self, events, read_events, write_events):
+        ready_to_read = []
+        ready_to_write = []
+        for fd, mask in events:
+            if fd == self.waker.fileno():
+                self.waker.drain()
+                continue
+            if mask & read_events and fd in self.read_streams:
+                stream = self.read_streams[fd]
+                ready_to_read.append((fd, stream))
+                if self.read_modes[fd] & event_loop.mode.ONESHOT:
+                    self.disarmed_reads[fd] = self.read_streams.pop(fd)
+            if mask & write_events and fd in self.write_streams:
+                stream = self.write_streams[fd]
+                ready_to_write.append((fd, stream))
+                if self.write_modes[fd] & event_loop.mode.ONESHOT:
+                    self.disarmed_writes[fd] = self.write_streams.pop(fd)
+            self.fired(fd)
+        instrument = self.instrument
+        for fd, stream in ready_to_read:
+            if fd not in self.read_listeners:
+                continue
+            if instrument is None:
+                self.read_listeners[fd](stream)
+            else:
+                instrument.dispatch(event_loop.instrument.IO, fd,
+                                    self.read_listeners[fd], stream)
+        for fd, stream in ready_to_write:
+            if fd not in self.write_listeners:
+                continue
+            if instrument is None:
+                self.write_listeners[fd](stream)
+            else:
+                instrument.dispatch(event_loop.instrument.IO, fd,
+                                    self.write_listeners[fd], stream)
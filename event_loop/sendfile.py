@@ -0,0 +1,112 @@
+import errno
+import io
+import os
+
+
+MAX_CHUNK_SIZE = 0x7ffff000
+FALLBACK_CHUNK_SIZE = 2 ** 16
+UNSUPPORTED = (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP)
+
+
+def file_descriptor(file):
+    try:
+        return file.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+
+
+class FileTransfer:
+    def __init__(self, loop, sock, file, offset=0, count=None, on_done=None,
+                 chunk_size=FALLBACK_CHUNK_SIZE):
+        self.loop = loop
+        self.sock = sock
+        self.file = file
+        self.offset = offset
+        self.on_done = on_done
+        self.fd = file_descriptor(file)
+        if count is None:
+            if self.fd is None:
+                count = file.seek(0, io.SEEK_END) - offset
+            else:
+                count = os.fstat(self.fd).st_size - offset
+        self.remaining = max(count, 0)
+        self.sent = 0
+        self.zero_copy = self.fd is not None and hasattr(os, 'sendfile')
+        self.view = memoryview(bytearray(chunk_size))
+        self.pending = self.view[:0]
+        self.done = False
+        if hasattr(sock, 'setblocking'):
+            sock.setblocking(False)
+        else:
+            os.set_blocking(sock.fileno(), False)
+
+    def start(self):
+        if not self.remaining:
+            self.finish()
+        else:
+            self.loop.add_write_stream(self.sock, self.handle_write)
+
+    def handle_write(self, sock):
+        try:
+            if self.zero_copy:
+                sent = self.send_zero_copy()
+            else:
+                sent = self.send_buffered()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self.finish(exc)
+            return
+        if sent is None:
+            self.finish(EOFError())
+            return
+        self.sent += sent
+        if not self.remaining and not self.pending:
+            self.finish()
+
+    def send_zero_copy(self):
+        try:
+            sent = os.sendfile(self.sock.fileno(), self.fd, self.offset,
+                               min(self.remaining, MAX_CHUNK_SIZE))
+        except OSError as exc:
+            if exc.errno not in UNSUPPORTED or self.sent:
+                raise
+            self.zero_copy = False
+            return self.send_buffered()
+        if not sent:
+            return None
+        self.offset += sent
+        self.remaining -= sent
+        return sent
+
+    def send_buffered(self):
+        if not self.pending:
+            self.file.seek(self.offset)
+            size = min(self.remaining, len(self.view))
+            read = self.file.readinto(self.view[:size])
+            if not read:
+                return None
+            self.offset += read
+            self.remaining -= read
+            self.pending = self.view[:read]
+        sent = os.write(self.sock.fileno(), self.pending)
+        self.pending = self.pending[sent:]
+        return sent
+
+    def cancel(self):
+        if not self.done:
+            self.done = True
+            self.loop.remove_write_stream(self.sock)
+
+    def finish(self, exc=None):
+        if self.done:
+            return
+        self.cancel()
+        if self.on_done is not None:
+            self.on_done(exc)
+
+
+def send_file(loop, sock, file, offset=0, count=None, on_done=None):
+    transfer = FileTransfer(loop, sock, file, offset, count, on_done)
+    transfer.start()
+    return transfer
@@ -0,0 +1,127 @@
+import errno
+import os
+import socket
+import stat
+
+
+DEFAULT_BACKLOG = 128
+ACCEPT_BATCH = 64
+ACCEPT_RETRY_DELAY = 0.1
+RESOURCE_ERRORS = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM)
+
+
+def bind(host, port, backlog=DEFAULT_BACKLOG, reuse_port=False):
+    if port is None:
+        return bind_unix(host, backlog)
+    if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+        raise ValueError
+    family, type, proto, _, address = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+    )[0]
+    sock = socket.socket(family, type, proto)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(address)
+        sock.listen(backlog)
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def bind_unix(path, backlog=DEFAULT_BACKLOG):
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+        sock.listen(backlog)
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class Server:
+    def __init__(self, loop, sock, on_connection, batch=ACCEPT_BATCH):
+        self.loop = loop
+        self.sock = sock
+        self.on_connection = on_connection
+        self.batch = batch
+        self.tcp = sock.family in (socket.AF_INET, socket.AF_INET6)
+        self.address = sock.getsockname()
+        self.accepted = 0
+        self.serving = False
+        self.retry_timer = None
+
+    def start(self):
+        if not self.serving:
+            self.serving = True
+            self.loop.add_read_stream(self.sock, self.handle_accept)
+
+    def stop(self):
+        if not self.serving:
+            return
+        self.serving = False
+        if self.retry_timer is None:
+            self.loop.remove_read_stream(self.sock)
+        else:
+            self.loop.cancel_timer(self.retry_timer)
+            self.retry_timer = None
+
+    def pause(self):
+        self.loop.remove_read_stream(self.sock)
+        self.retry_timer = self.loop.add_timer(ACCEPT_RETRY_DELAY, self.resume)
+
+    def resume(self):
+        self.retry_timer = None
+        self.loop.add_read_stream(self.sock, self.handle_accept)
+
+    def close(self):
+        self.stop()
+        self.sock.close()
+        if not self.tcp and isinstance(self.address, str) and self.address:
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+
+    def handle_accept(self, sock):
+        for _ in range(self.batch):
+            try:
+                conn, address = sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionAbortedError:
+                continue
+            except OSError as exc:
+                if exc.errno not in RESOURCE_ERRORS:
+                    raise
+                self.pause()
+                return
+            conn.setblocking(False)
+            if self.tcp:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.accepted += 1
+            self.on_connection(conn, address)
+            if not self.serving:
+                return
+
+
+def serve(loop, sock, on_connection, batch=ACCEPT_BATCH):
+    server = Server(loop, sock, on_connection, batch)
+    server.start()
+    return server
+
+
+def create_server(loop, host, port, on_connection, backlog=DEFAULT_BACKLOG,
+                  reuse_port=False, batch=ACCEPT_BATCH):
+    return serve(loop, bind(host, port, backlog, reuse_port), on_connection,
+                 batch)
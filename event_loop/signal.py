@@ -1,6 +1,10 @@
+import event_loop.instrument
+
+
 class Signals:
     def __init__(self):
         self.signals = {}
+        self.instrument = None
 
     def empty(self):
         return len(self.signals) == 0
@@ -12,8 +16,13 @@ class Signals:
 
     def call(self, signum):
         if signum in self.signals:
+            instrument = self.instrument
             for listener in self.signals[signum]:
-                listener()
+                if instrument is None:
+                    listener()
+                else:
+                    instrument.dispatch(event_loop.instrument.SIGNAL, signum,
+                                        listener)
 
     def add(self, signum, listener):
         if signum not in self.signals:
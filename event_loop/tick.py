@@ -1,19 +1,32 @@
+import collections
 import queue
 
+import event_loop.instrument
+
 
 class FutureTickQueue:
     def __init__(self, size=0):
-        self.queue = queue.Queue(size)
+        self.size = size
+        self.queue = collections.deque()
+        self.instrument = None
+
+    def __len__(self):
+        return len(self.queue)
 
     def empty(self):
-        return self.queue.empty()
+        return not self.queue
 
     def add(self, listener):
-        self.queue.put(listener)
+        if self.size and len(self.queue) >= self.size:
+            raise queue.Full
+        self.queue.append(listener)
 
     def tick(self):
-        amount = self.queue.qsize()
-        while amount > 0:
-            amount -= 1
-            listener = self.queue.get()
-            listener()
+        popleft = self.queue.popleft
+        instrument = self.instrument
+        if instrument is None:
+            for _ in range(len(self.queue)):
+                popleft()()
+        else:
+            for _ in range(len(self.queue)):
+                instrument.dispatch(event_loop.instrument.TICK, None, popleft())
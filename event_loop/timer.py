@@ -1,76 +1,294 @@
 import time
 import heapq
+import itertools
+import math
+import operator
+
+import event_loop.instrument
 
 
 MIN_INTERVAL = 0.000001
+MIN_COMPACTION_SIZE = 256
+DEFAULT_RESOLUTION = 0.001
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+ALL_SLOTS = (1 << SLOTS) - 1
+
+
+def coalesce(deadline, slack):
+    if slack <= 0:
+        return deadline
+    return math.ceil(deadline / slack) * slack
 
 
 class Timer:
-    def __init__(self, interval, callback, periodic=False):
+    __slots__ = ('interval', 'callback', 'periodic', 'slack', 'loop', 'handle')
+
+    def __init__(self, interval, callback, periodic=False, slack=0, loop=None):
         self.interval = MIN_INTERVAL if interval < MIN_INTERVAL else interval
         self.callback = callback
         self.periodic = periodic
+        self.slack = slack
+        self.loop = loop
+        self.handle = None
+
+    def reset(self, interval=None):
+        self.loop.reschedule_timer(self, interval)
 
 
 class Timers:
     def __init__(self):
         self.time = None
-        self.timers = {}
+        self.count = 0
+        self.instrument = None
         self.schedule = []
+        self.sequence = itertools.count()
+        self.cancelled = 0
 
     def tick(self):
         timestamp = self.update_time()
+        instrument = self.instrument
         while self.schedule and self.schedule[0][0] < timestamp:
-            _, tid, timer = heapq.heappop(self.schedule)
-            if tid not in self.timers or timer is not self.timers[tid]:
+            entry = heapq.heappop(self.schedule)
+            _, _, timer, deadline = entry
+            if timer is None:
+                self.cancelled -= 1
+                continue
+            if deadline > entry[0]:
+                self.repush(entry)
                 continue
-            timer = self.timers[tid]
-            timer.callback()
             if timer.periodic:
-                heapq.heappush(
-                    self.schedule,
-                    (timestamp + timer.interval, tid, timer)
-                )
+                entry[3] = coalesce(timestamp + timer.interval, timer.slack)
+                self.repush(entry)
+            else:
+                timer.handle = None
+                self.count -= 1
+            if instrument is None:
+                timer.callback()
             else:
-                self.garbage_collect(tid)
+                instrument.late(timestamp - deadline)
+                instrument.dispatch(event_loop.instrument.TIMER, timer,
+                                    timer.callback)
 
     def __contains__(self, timer):
-        return hash(timer) in self.timers
+        return timer.handle is not None
 
     def get_time(self):
         return self.update_time() if self.time is None else self.time
 
     def update_time(self):
-        self.time = time.time()
+        self.time = time.monotonic()
         return self.time
 
     def empty(self):
-        return len(self.timers) == 0
+        return self.count == 0
 
     def add(self, timer):
-        tid = hash(timer)
-        self.timers[tid] = timer
-        heapq.heappush(
-            self.schedule,
-            (timer.interval + self.update_time(), tid, timer)
-        )
+        scheduled_at = coalesce(timer.interval + self.update_time(), timer.slack)
+        self.push(timer, scheduled_at)
+
+    def push(self, timer, scheduled_at):
+        entry = [scheduled_at, next(self.sequence), timer, scheduled_at]
+        timer.handle = entry
+        self.count += 1
+        heapq.heappush(self.schedule, entry)
+
+    def repush(self, entry):
+        entry[0] = entry[3]
+        entry[1] = next(self.sequence)
+        heapq.heappush(self.schedule, entry)
+
+    def reschedule(self, timer):
+        deadline = coalesce(self.update_time() + timer.interval, timer.slack)
+        entry = timer.handle
+        if entry is not None and entry[0] <= deadline:
+            entry[3] = deadline
+            return
+        self.cancel(timer)
+        self.push(timer, deadline)
 
     def cancel(self, timer):
-        return self.garbage_collect(hash(timer))
+        entry = timer.handle
+        if entry is None:
+            return False
+        timer.handle = None
+        entry[2] = None
+        self.count -= 1
+        self.cancelled += 1
+        if (self.cancelled > MIN_COMPACTION_SIZE and
+                self.cancelled * 2 > len(self.schedule)):
+            self.compact()
+        return True
+
+    def compact(self):
+        self.schedule = [entry for entry in self.schedule
+                         if entry[2] is not None]
+        heapq.heapify(self.schedule)
+        self.cancelled = 0
 
     def get_first(self):
-        if not self.schedule:
-            return None
-        scheduled_at, tid, _ = self.schedule[0]
-        return (scheduled_at, self.timers[tid])
+        while self.schedule:
+            entry = self.schedule[0]
+            if entry[2] is None:
+                heapq.heappop(self.schedule)
+                self.cancelled -= 1
+            elif entry[3] > entry[0]:
+                self.repush(heapq.heappop(self.schedule))
+            else:
+                return (entry[0], entry[2])
+        return None
+
+
+class TimingWheel:
+    def __init__(self, resolution=DEFAULT_RESOLUTION):
+        self.resolution = resolution
+        self.time = None
+        self.current = int(self.update_time() / resolution)
+        self.count = 0
+        self.instrument = None
+        self.levels = [[{} for _ in range(SLOTS)]]
+        self.occupied = [0]
+
+    def tick(self):
+        target = int(self.update_time() / self.resolution)
+        while self.current < target:
+            tick = self.next_tick()
+            if tick is None or tick > target:
+                self.current = target
+                break
+            self.current = tick
+            self.expire(tick)
 
-    def garbage_collect(self, tid):
-        if tid not in self.timers:
+    def next_tick(self):
+        first = None
+        for level, bits in enumerate(self.occupied):
+            if bits:
+                tick = self.next_index(level) << (SLOT_BITS * level)
+                if first is None or tick < first:
+                    first = tick
+        return first
+
+    def next_index(self, level):
+        base = (self.current >> (SLOT_BITS * level)) + 1
+        start = base & SLOT_MASK
+        bits = self.occupied[level]
+        bits = (bits >> start | bits << (SLOTS - start)) & ALL_SLOTS
+        return base + (bits & -bits).bit_length() - 1
+
+    def expire(self, tick):
+        top = 1
+        while (top < len(self.levels) and
+               not tick & ((1 << (SLOT_BITS * top)) - 1)):
+            top += 1
+        for level in range(top - 1, 0, -1):
+            for entry in self.take(level, tick >> (SLOT_BITS * level)):
+                self.place(entry)
+        for entry in self.take(0, tick):
+            timer = entry[1]
+            if timer.handle is not entry:
+                continue
+            if timer.periodic:
+                scheduled_at = tick * self.resolution + timer.interval
+                entry[0] = max(self.to_ticks(coalesce(scheduled_at, timer.slack)),
+                               self.current + 1)
+                self.place(entry)
+            else:
+                timer.handle = None
+                self.count -= 1
+            if self.instrument is None:
+                timer.callback()
+            else:
+                self.instrument.late(self.time - tick * self.resolution)
+                self.instrument.dispatch(event_loop.instrument.TIMER, timer,
+                                         timer.callback)
+
+    def take(self, level, slot):
+        slot &= SLOT_MASK
+        slots = self.levels[level]
+        bucket = slots[slot]
+        if not bucket:
+            return ()
+        slots[slot] = {}
+        self.occupied[level] &= ~(1 << slot)
+        return bucket.values()
+
+    def place(self, entry):
+        deadline = entry[0]
+        delta = deadline - self.current
+        if delta < SLOTS:
+            level = 0
+            slot = deadline & SLOT_MASK
+        else:
+            level = (delta.bit_length() - 1) // SLOT_BITS
+            slot = (deadline >> (SLOT_BITS * level)) & SLOT_MASK
+            while len(self.levels) <= level:
+                self.levels.append([{} for _ in range(SLOTS)])
+                self.occupied.append(0)
+        self.levels[level][slot][entry[1]] = entry
+        self.occupied[level] |= 1 << slot
+        entry[2] = level
+        entry[3] = slot
+
+    def push(self, timer, deadline):
+        current = self.current
+        entry = [deadline if deadline > current else current + 1, timer, 0, 0]
+        timer.handle = entry
+        self.count += 1
+        self.place(entry)
+
+    def to_ticks(self, interval):
+        return math.ceil(interval / self.resolution)
+
+    def __contains__(self, timer):
+        return timer.handle is not None
+
+    def get_time(self):
+        return self.update_time() if self.time is None else self.time
+
+    def update_time(self):
+        self.time = time.monotonic()
+        return self.time
+
+    def empty(self):
+        return self.count == 0
+
+    def add(self, timer):
+        scheduled_at = coalesce(self.update_time() + timer.interval, timer.slack)
+        self.push(timer, math.ceil(scheduled_at / self.resolution))
+
+    def reschedule(self, timer):
+        scheduled_at = coalesce(self.update_time() + timer.interval, timer.slack)
+        self.cancel(timer)
+        self.push(timer, self.to_ticks(scheduled_at))
+
+    def cancel(self, timer):
+        entry = timer.handle
+        if entry is None:
             return False
-        del self.timers[tid]
-        for i in range(0, len(self.schedule)):
-            _, key, _ = self.schedule[i]
-            if tid == key:
-                self.schedule.pop(i)
-                heapq.heapify(self.schedule)
+        timer.handle = None
+        self.count -= 1
+        _, _, level, slot = entry
+        bucket = self.levels[level][slot]
+        if bucket.pop(timer, None) is not None and not bucket:
+            self.occupied[level] &= ~(1 << slot)
         return True
+
+    def get_first(self):
+        first = None
+        for level, bits in enumerate(self.occupied):
+            if not bits:
+                continue
+            index = self.next_index(level)
+            if first is not None and index << (SLOT_BITS * level) >= first[0]:
+                continue
+            bucket = self.levels[level][index & SLOT_MASK]
+            if level:
+                entry = min(bucket.values(), key=operator.itemgetter(0))
+            else:
+                entry = next(iter(bucket.values()))
+            if first is None or entry[0] < first[0]:
+                first = entry
+        if first is None:
+            return None
+        return (first[0] * self.resolution, first[1])
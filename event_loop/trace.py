@@ -0,0 +1,116 @@
+import collections
+import json
+import os
+import threading
+import time
+
+import event_loop.debug
+import event_loop.instrument
+
+
+DEFAULT_CAPACITY = 65536
+DEFAULT_PATH = 'trace.json'
+MICROSECONDS_PER_SECOND = 1000000
+ITERATION = 'iteration'
+POLL = 'poll'
+LOOP = 'loop'
+SOURCE_ARGUMENTS = {
+    event_loop.instrument.TICK: None,
+    event_loop.instrument.TIMER: 'timer',
+    event_loop.instrument.IO: 'fd',
+    event_loop.instrument.SIGNAL: 'signum'
+}
+
+
+class Tracer(event_loop.instrument.Instrument):
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=DEFAULT_PATH,
+                 clock=time.perf_counter):
+        super().__init__(clock)
+        self.path = path
+        self.events = collections.deque(maxlen=capacity)
+        self.recorded = 0
+        self.iteration_started = None
+        self.iteration_args = None
+        self.pid = os.getpid()
+        self.tid = None
+
+    def add(self, name, category, start, duration, args):
+        self.recorded += 1
+        self.events.append((name, category, start, duration, args))
+
+    def begin_iteration(self, ticks, timers):
+        super().begin_iteration(ticks, timers)
+        now = self.clock()
+        self.finish_iteration(now)
+        self.tid = threading.get_ident()
+        self.iteration_started = now
+        self.iteration_args = {'ticks': ticks, 'timers': timers}
+
+    def finish_iteration(self, now):
+        if self.iteration_started is not None:
+            self.add(ITERATION, LOOP, self.iteration_started,
+                     now - self.iteration_started, self.iteration_args)
+            self.iteration_started = None
+
+    def record_poll(self, start, duration):
+        super().record_poll(start, duration)
+        self.add(POLL, LOOP, start, duration, None)
+
+    def end_run(self):
+        super().end_run()
+        self.finish_iteration(self.clock())
+
+    def record(self, kind, source, callback, start, duration):
+        super().record(kind, source, callback, start, duration)
+        argument = SOURCE_ARGUMENTS[kind]
+        if argument is None:
+            args = None
+        elif kind == event_loop.instrument.TIMER:
+            args = {argument: id(source)}
+        else:
+            args = {argument: source}
+        qualname, _ = event_loop.debug.describe(callback)
+        self.add(qualname, kind, start, duration, args)
+
+    def clear(self):
+        self.events.clear()
+        self.recorded = 0
+
+    def trace_events(self):
+        events = []
+        for name, category, start, duration, args in list(self.events):
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': start * MICROSECONDS_PER_SECOND,
+                'dur': duration * MICROSECONDS_PER_SECOND,
+                'pid': self.pid,
+                'tid': self.tid
+            }
+            if args is not None:
+                event['args'] = args
+            events.append(event)
+        return events
+
+    def export(self):
+        return {
+            'traceEvents': self.trace_events(),
+            'displayTimeUnit': 'ms',
+            'otherData': {'dropped': self.recorded - len(self.events)}
+        }
+
+    def dump(self, path=None):
+        with open(self.path if path is None else path, 'w') as fp:
+            json.dump(self.export(), fp)
+
+    def on_signal(self):
+        self.dump()
+
+
+def enable(loop, capacity=DEFAULT_CAPACITY, signum=None, path=DEFAULT_PATH):
+    tracer = Tracer(capacity, path)
+    loop.set_instrument(tracer)
+    if signum is not None:
+        loop.add_signal(signum, tracer.on_signal)
+    return tracer
@@ -0,0 +1,45 @@
+import os
+import sys
+import weakref
+
+
+WAKEUP = (1).to_bytes(8, sys.byteorder)
+BUFFER_SIZE = 4096
+
+
+def close(*fds):
+    for fd in set(fds):
+        os.close(fd)
+
+
+class Waker:
+    def __init__(self):
+        if hasattr(os, 'eventfd'):
+            flags = os.EFD_CLOEXEC | os.EFD_NONBLOCK
+            self.reader = self.writer = os.eventfd(0, flags)
+        else:
+            self.reader, self.writer = os.pipe()
+            os.set_blocking(self.reader, False)
+            os.set_blocking(self.writer, False)
+        self.pending = False
+        self.close = weakref.finalize(self, close, self.reader, self.writer)
+
+    def fileno(self):
+        return self.reader
+
+    def wake(self):
+        if self.pending:
+            return
+        self.pending = True
+        try:
+            os.write(self.writer, WAKEUP)
+        except BlockingIOError:
+            pass
+
+    def drain(self):
+        try:
+            while os.read(self.reader, BUFFER_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+        self.pending = False
@@ -1,40 +1,29 @@
-import socket
 import event_loop
+import event_loop.connection
 
 
-def process_incoming_connection(stream):
-    conn, addr = stream.accept()
+def process_incoming_connection(conn, addr):
     print("Incoming connection from ", addr)
-    loop.add_read_stream(conn, read)
+    connection = event_loop.connection.Connection(
+        loop,
+        conn,
+        lambda data: echo(connection, data)
+    )
 
 
-def read(stream):
-    data = stream.recv(2**16)
+def echo(connection, data):
+    data = bytes(data)
     print(data)
-    if not data or data in [b'quit\r\n', b'\r\n']:
-        stream.close()
-        loop.remove_read_stream(stream)
+    if data in [b'quit\r\n', b'\r\n']:
+        connection.close()
     else:
-        loop.remove_read_stream(stream)
-        loop.add_write_stream(stream, echo(data))
-
-
-def echo(data):
-    def f(stream):
-        stream.send(data)
-        loop.remove_write_stream(stream)
-        loop.add_read_stream(stream, read)
-    return f
+        connection.write(data)
 
 
 HOST, PORT = ("localhost", 8080)
-server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-server.setblocking(False)
-server.bind((HOST, PORT))
-server.listen(5)
 
 loop = event_loop.SelectLoop()
-loop.add_read_stream(server, process_incoming_connection)
+loop.create_server(HOST, PORT, process_incoming_connection, backlog=5)
 loop.add_periodic_timer(5, lambda: print("tick"))
 
 print("[SERVER] host: %s, port: %d" % (HOST, PORT))
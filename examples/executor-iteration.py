@@ -0,0 +1,20 @@
+import time
+import event_loop
+
+
+def slow_sum(source):
+    time.sleep(1)  # blocking
+    return sum(source)
+
+
+loop = event_loop.SelectLoop()
+loop.add_timer(0, lambda: print("timeout 0"))
+loop.run_in_executor(
+    None,
+    slow_sum,
+    range(10**2),
+    callback=lambda future: print("sum", future.result())
+)
+loop.add_periodic_timer(0.25, lambda: print("tick"), slack=0.05)
+loop.add_timer(1.5, loop.stop)
+loop.run()
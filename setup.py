@@ -15,5 +15,8 @@ setup(
     license='LICENSE.txt',
     long_description=readme(),
     packages=['event_loop'],
-    install_requires=['mood.event', 'pyuv']
+    extras_require={
+        'libev': ['mood.event'],
+        'libuv': ['pyuv']
+    }
 )
@@ -1,11 +1,22 @@
+import concurrent.futures
+import errno
+import gc
 import io
 import os
 import pytest
 import signal
 import socket
+import threading
 import time
 import unittest
 
+import event_loop.connection
+import event_loop.debug
+import event_loop.instrument
+import event_loop.mode
+import event_loop.sendfile
+import event_loop.server
+import event_loop.trace
 import tests.testkit as testkit
 
 
@@ -70,6 +81,13 @@ def test_periodic_timer(loop, mock):
     assert mock.call_count == 2
 
 
+def test_unreferenced_timer_survives_garbage_collection(loop, mock):
+    loop.add_timer(0.01, mock)
+    gc.collect()
+    loop.run()
+    mock.assert_called_once()
+
+
 def test_remove_read_stream_instantly(loop, mock, socket_pair):
     loop.add_read_stream(socket_pair[0], mock)
     loop.remove_read_stream(socket_pair[0])
@@ -301,6 +319,7 @@ def test_signals_are_not_handled_without_the_running_loop(loop, mock):
     loop.add_signal(signal.SIGUSR1, mock)
     os.kill(os.getpid(), signal.SIGUSR1)
     mock.assert_not_called()
+    loop.remove_signal(signal.SIGUSR1, mock)
 
 
 def test_many_handlers_per_signal(loop, mock):
@@ -317,3 +336,660 @@ def test_signal_multiple_usages_for_the_same_listener(loop, mock):
     os.kill(os.getpid(), signal.SIGHUP)
     loop.next_tick()
     mock.assert_called_once()
+
+
+def test_oneshot_read_stream_fires_once(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.ONESHOT)
+    socket_pair[1].send(b"foo")
+    loop.next_tick()
+    loop.next_tick()
+    mock.assert_called_once()
+
+
+def test_rearm_oneshot_read_stream(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.ONESHOT)
+    socket_pair[1].send(b"foo")
+    loop.next_tick()
+    loop.rearm_read_stream(socket_pair[0])
+    loop.next_tick()
+    assert mock.call_count == 2
+
+
+def test_oneshot_write_stream_rearms_itself(loop, mock, socket_pair):
+    def rearm_itself(stream):
+        mock()
+        if mock.call_count < 3:
+            loop.rearm_write_stream(stream)
+
+    loop.add_write_stream(socket_pair[1], rearm_itself,
+                          mode=event_loop.mode.ONESHOT)
+    loop.run()
+    assert mock.call_count == 3
+
+
+def test_remove_disarmed_oneshot_stream(loop, mock, socket_pair):
+    loop.add_write_stream(socket_pair[1], mock, mode=event_loop.mode.ONESHOT)
+    loop.next_tick()
+    loop.remove_write_stream(socket_pair[1])
+    loop.rearm_write_stream(socket_pair[1])
+    loop.next_tick()
+    mock.assert_called_once()
+
+
+def test_rearm_level_triggered_stream_is_ignored(loop, mock, socket_pair):
+    loop.add_write_stream(socket_pair[1], mock)
+    loop.rearm_write_stream(socket_pair[1])
+    loop.next_tick()
+    mock.assert_called_once()
+
+
+def test_edge_triggered_read_stream(loop, mock, socket_pair):
+    if event_loop.mode.EDGE not in loop.modes:
+        pytest.skip("edge-triggered mode is not supported")
+    loop.add_read_stream(socket_pair[0],
+                         lambda stream: mock(stream.recv(3)),
+                         mode=event_loop.mode.EDGE)
+    socket_pair[1].send(b"foobar")
+    loop.next_tick()
+    loop.next_tick()
+    mock.assert_called_once_with(b"foo")
+    socket_pair[1].send(b"baz")
+    loop.next_tick()
+    assert mock.call_args_list[1] == unittest.mock.call(b"bar")
+
+
+def test_unsupported_modes_are_rejected(loop, mock, socket_pair):
+    for mode in event_loop.mode.ALL - loop.modes:
+        with pytest.raises(ValueError):
+            loop.add_read_stream(socket_pair[0], mock, mode=mode)
+        with pytest.raises(ValueError):
+            loop.add_write_stream(socket_pair[0], mock, mode=mode)
+    assert not loop.read_streams
+    assert not loop.write_streams
+
+
+def test_waiting_for_distant_timer_does_not_burn_cpu(loop, mock):
+    loop.add_timer(0.3, mock)
+    start = time.process_time()
+    loop.run()
+    assert time.process_time() - start < 0.05
+    mock.assert_called_once()
+
+
+def test_timer_is_delayed_no_longer_than_its_slack(loop, mock):
+    loop.add_timer(0.01, lambda: mock(time.monotonic() - start), slack=0.05)
+    start = time.monotonic()
+    loop.run()
+    elapsed, = mock.call_args.args
+    assert 0.009 <= elapsed < 0.09
+
+
+def test_loop_slack_is_applied_to_timers_by_default(loop, mock):
+    loop.slack = 0.02
+    timer = loop.add_periodic_timer(0.05, mock)
+    assert timer.slack == 0.02
+    loop.cancel_timer(timer)
+
+
+def test_reset_postpones_timer(loop, mock):
+    timer = loop.add_timer(0.05, lambda: mock(time.monotonic() - start))
+    loop.add_timer(0.03, lambda: timer.reset())
+    start = time.monotonic()
+    loop.run()
+    elapsed, = mock.call_args.args
+    assert elapsed >= 0.075
+
+
+def test_reschedule_timer_with_shorter_interval(loop, mock):
+    timer = loop.add_timer(10, mock)
+    loop.reschedule_timer(timer, 0.01)
+    start = time.monotonic()
+    loop.run()
+    assert time.monotonic() - start < 1
+    mock.assert_called_once()
+
+
+def test_reset_rearms_fired_timer(loop, mock):
+    timer = loop.add_timer(0.001, lambda: mock(mock.call_count or timer.reset()))
+    loop.run()
+    assert mock.call_count == 2
+
+
+def test_reset_periodic_timer_changes_its_interval(loop, mock):
+    def tick():
+        mock(time.monotonic())
+        if mock.call_count == 1:
+            timer.reset(0.05)
+        elif mock.call_count == 3:
+            loop.cancel_timer(timer)
+
+    timer = loop.add_periodic_timer(0.001, tick)
+    loop.run()
+    first, second, third = (call.args[0] for call in mock.call_args_list)
+    assert second - first >= 0.045
+    assert third - second >= 0.045
+
+
+def test_call_soon_threadsafe_wakes_up_blocked_loop(loop, mock):
+    timer = loop.add_timer(10, mock)
+
+    def work():
+        time.sleep(0.05)
+        loop.call_soon_threadsafe(lambda: mock(loop.cancel_timer(timer)))
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    start = time.monotonic()
+    loop.run()
+    thread.join()
+    assert time.monotonic() - start < 1
+    mock.assert_called_once()
+
+
+def test_call_soon_threadsafe_from_the_loop_thread(loop, mock):
+    loop.call_soon_threadsafe(lambda: mock(1))
+    loop.call_soon_threadsafe(lambda: mock(2))
+    loop.run()
+    assert mock.call_args_list == [unittest.mock.call(1), unittest.mock.call(2)]
+
+
+def test_signal_wakes_up_loop_waiting_only_for_signals(loop, mock):
+    def listener(*args):
+        mock()
+        loop.remove_signal(signal.SIGUSR1, listener)
+
+    loop.add_signal(signal.SIGUSR1, listener)
+    sender = threading.Timer(0.05, os.kill, (os.getpid(), signal.SIGUSR1))
+    sender.start()
+    loop.run()
+    sender.join()
+    mock.assert_called_once()
+
+
+def test_run_in_executor_delivers_result_on_the_loop_thread(loop, mock):
+    def work(base, exponent):
+        time.sleep(0.05)
+        return base ** exponent
+
+    loop.run_in_executor(
+        None, work, 2, 10,
+        callback=lambda future: mock(future.result(),
+                                     threading.current_thread())
+    )
+    loop.run()
+    mock.assert_called_once_with(1024, threading.current_thread())
+
+
+def test_run_in_executor_delivers_exception(loop, mock):
+    def fail():
+        raise ValueError
+
+    loop.run_in_executor(None, fail,
+                         callback=lambda future: mock(future.exception()))
+    loop.run()
+    exception, = mock.call_args.args
+    assert isinstance(exception, ValueError)
+
+
+def test_run_in_custom_executor(loop, mock):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        future = loop.run_in_executor(executor, sum, [1, 2, 3], callback=mock)
+        loop.run()
+    mock.assert_called_once_with(future)
+    assert future.result() == 6
+    assert loop.executions.executor is None
+
+
+def test_default_executor_is_created_lazily(loop):
+    assert loop.executions.executor is None
+    loop.run_in_executor(None, int)
+    loop.run()
+    assert loop.executions.executor is not None
+    assert loop.executions.empty()
+
+
+def test_listener_removes_stream_that_is_ready_later_in_the_same_pass(loop, mock):
+    first = testkit.create_socket_pair()
+    second = testkit.create_socket_pair()
+
+    def remove_both(stream):
+        mock()
+        loop.remove_read_stream(first[0])
+        loop.remove_read_stream(second[0])
+
+    loop.add_read_stream(first[0], remove_both)
+    loop.add_read_stream(second[0], remove_both)
+    first[1].send(b"foo")
+    second[1].send(b"bar")
+    loop.run()
+    for stream in first + second:
+        stream.close()
+    mock.assert_called_once()
+
+
+def test_timer_fits_its_memory_budget(loop, timer_budget):
+    callback = lambda: None
+    allocated = testkit.allocated_per_call(lambda: loop.add_timer(10, callback))
+    assert allocated <= timer_budget
+
+
+def test_instrument_counts_callbacks_per_phase(loop, socket_pair):
+    instrument = event_loop.instrument.Instrument()
+    loop.set_instrument(instrument)
+
+    def read(stream):
+        stream.recv(3)
+        loop.remove_read_stream(stream)
+        os.kill(os.getpid(), signal.SIGUSR1)
+
+    def on_signal(*args):
+        loop.remove_signal(signal.SIGUSR1, on_signal)
+
+    loop.add_signal(signal.SIGUSR1, on_signal)
+    loop.future_tick(lambda: None)
+    loop.add_timer(0.01, lambda: socket_pair[1].send(b"foo"))
+    loop.add_read_stream(socket_pair[0], read)
+    loop.run()
+    assert instrument.callbacks == {
+        event_loop.instrument.TICK: 1,
+        event_loop.instrument.TIMER: 1,
+        event_loop.instrument.IO: 1,
+        event_loop.instrument.SIGNAL: 1
+    }
+    assert instrument.iterations >= 2
+    assert instrument.tick_depth.max == 1
+    assert instrument.timer_depth.max == 1
+    assert instrument.lateness.count == 1
+
+
+def test_instrument_splits_poll_and_dispatch_time(loop):
+    instrument = event_loop.instrument.Instrument()
+    loop.set_instrument(instrument)
+    loop.add_timer(0.05, lambda: time.sleep(0.02))
+    loop.run()
+    assert instrument.poll_time >= 0.03
+    assert 0.015 <= instrument.dispatch_time < instrument.poll_time
+    assert instrument.durations[event_loop.instrument.TIMER].max >= 0.015
+
+
+def test_detached_instrument_records_nothing(loop, mock):
+    instrument = event_loop.instrument.Instrument()
+    loop.set_instrument(instrument)
+    loop.set_instrument(None)
+    loop.future_tick(mock)
+    loop.add_timer(0.001, mock)
+    loop.run()
+    assert mock.call_count == 2
+    assert instrument.iterations == 0
+    assert not any(instrument.callbacks.values())
+
+
+def test_slow_callbacks_are_reported(loop, mock):
+    def slow_timer():
+        time.sleep(0.03)
+
+    detector = event_loop.debug.SlowCallbackDetector(threshold=0.02,
+                                                     on_slow_callback=mock)
+    loop.set_instrument(detector)
+    loop.future_tick(lambda: None)
+    loop.add_timer(0.001, slow_timer)
+    loop.run()
+    mock.assert_called_once()
+    slow, = mock.call_args.args
+    assert slow.kind == event_loop.instrument.TIMER
+    assert slow.qualname.endswith('slow_timer')
+    assert slow.location.startswith(__file__)
+    assert slow.duration >= 0.02
+
+
+def test_tracer_records_a_timeline(loop, socket_pair):
+    tracer = event_loop.trace.Tracer()
+    loop.set_instrument(tracer)
+
+    def read(stream):
+        stream.recv(3)
+        loop.remove_read_stream(stream)
+
+    loop.future_tick(lambda: None)
+    timer = loop.add_timer(0.01, lambda: socket_pair[1].send(b"foo"))
+    loop.add_read_stream(socket_pair[0], read)
+    loop.run()
+    events = tracer.export()['traceEvents']
+    names = {event['name'] for event in events}
+    assert {'iteration', 'poll'} <= names
+    by_category = {event['cat']: event for event in events}
+    assert by_category[event_loop.instrument.TIMER]['args'] == {'timer': id(timer)}
+    assert by_category[event_loop.instrument.IO]['args'] == {
+        'fd': socket_pair[0].fileno()
+    }
+    assert event_loop.instrument.TICK in by_category
+    assert all(event['dur'] >= 0 for event in events)
+
+
+def test_connection_delivers_data_from_a_reusable_buffer(loop, mock, socket_pair):
+    views = []
+
+    def on_data(view):
+        views.append(view.obj)
+        mock(bytes(view))
+        if mock.call_count == 2:
+            connection.close()
+
+    connection = event_loop.connection.Connection(loop, socket_pair[0], on_data)
+    socket_pair[1].send(b"foo")
+    loop.add_timer(0.01, lambda: socket_pair[1].send(b"bar"))
+    loop.run()
+    assert mock.call_args_list == [unittest.mock.call(b"foo"),
+                                   unittest.mock.call(b"bar")]
+    assert views[0] is views[1] is connection.read_buffer
+    assert connection.closed
+
+
+def test_connection_reports_end_of_stream(loop, mock, socket_pair):
+    event_loop.connection.Connection(loop, socket_pair[0], mock.data,
+                                     on_close=mock.close)
+    socket_pair[1].close()
+    loop.run()
+    mock.data.assert_not_called()
+    mock.close.assert_called_once_with(None)
+    assert not loop.read_streams
+
+
+def test_connection_buffers_partial_writes_until_writable(loop, socket_pair):
+    received = bytearray()
+    payload = os.urandom(2 ** 20)
+
+    def read(stream):
+        received.extend(stream.recv(2 ** 16))
+        if len(received) == len(payload):
+            loop.remove_read_stream(stream)
+
+    connection = event_loop.connection.Connection(
+        loop, socket_pair[0], lambda view: None, high_water=2 ** 21
+    )
+    connection.pause_reading()
+    connection.write(payload)
+    assert 0 < connection.pending() < len(payload)
+    assert loop.write_streams
+    loop.add_read_stream(socket_pair[1], read)
+    loop.run()
+    assert received == payload
+    assert connection.pending() == 0
+    assert not loop.write_streams
+
+
+def test_connection_watermarks_pause_and_resume(loop, mock, socket_pair):
+    def read(stream):
+        stream.recv(2 ** 16)
+        if not connection.pending():
+            loop.remove_read_stream(stream)
+
+    connection = event_loop.connection.Connection(
+        loop, socket_pair[0], lambda view: None, on_pause=mock.pause,
+        on_resume=mock.resume, high_water=2 ** 16, low_water=2 ** 12
+    )
+    connection.pause_reading()
+    connection.write(b"x" * 2 ** 17)
+    connection.write(b"x")
+    mock.pause.assert_called_once_with()
+    mock.resume.assert_not_called()
+    loop.add_read_stream(socket_pair[1], read)
+    loop.run()
+    assert mock.mock_calls == [unittest.mock.call.pause(),
+                               unittest.mock.call.resume()]
+
+
+def test_connection_pauses_its_own_reading_by_default(loop, socket_pair):
+    connection = event_loop.connection.Connection(
+        loop, socket_pair[0], lambda view: None, high_water=1024, low_water=0
+    )
+    connection.write(b"x" * 2 ** 17)
+    assert not connection.reading
+    assert socket_pair[0].fileno() not in loop.read_streams
+    loop.add_read_stream(socket_pair[1], lambda stream: stream.recv(2 ** 16))
+    while connection.pending():
+        loop.next_tick()
+    assert connection.reading
+    connection.abort()
+    loop.remove_read_stream(socket_pair[1])
+
+
+def test_connection_close_flushes_pending_writes(loop, mock, socket_pair):
+    received = bytearray()
+    payload = os.urandom(2 ** 18)
+
+    def read(stream):
+        data = stream.recv(2 ** 16)
+        received.extend(data)
+        if not data:
+            loop.remove_read_stream(stream)
+
+    connection = event_loop.connection.Connection(
+        loop, socket_pair[0], lambda view: None, on_close=mock
+    )
+    connection.write(payload)
+    connection.close()
+    mock.assert_not_called()
+    with pytest.raises(ValueError):
+        connection.write(b"late")
+    loop.add_read_stream(socket_pair[1], read)
+    loop.run()
+    assert received == payload
+    mock.assert_called_once_with(None)
+
+
+def test_connection_writes_chunks_with_few_syscalls(loop, socket_pair):
+    received = bytearray()
+    chunks = [b"header: %d\r\n" % i for i in range(100)] + [os.urandom(2 ** 18)]
+
+    def read(stream):
+        received.extend(stream.recv(2 ** 16))
+        if len(received) == sum(map(len, chunks)):
+            loop.remove_read_stream(stream)
+
+    connection = event_loop.connection.Connection(
+        loop, socket_pair[0], lambda view: None, high_water=2 ** 20
+    )
+    connection.pause_reading()
+    connection.writelines(chunks)
+    assert 0 < connection.pending() < sum(map(len, chunks))
+    loop.add_read_stream(socket_pair[1], read)
+    loop.run()
+    assert received == b"".join(chunks)
+    assert connection.pending() == 0
+    assert not loop.write_streams
+
+
+def receive_file(loop, stream, received, size):
+    def read(stream):
+        received.extend(stream.recv(2 ** 16))
+        if len(received) >= size:
+            loop.remove_read_stream(stream)
+
+    loop.add_read_stream(stream, read)
+
+
+def test_send_file_streams_a_file_range(loop, mock, socket_pair, tmp_path):
+    payload = os.urandom(2 ** 20)
+    path = tmp_path / 'payload'
+    path.write_bytes(payload)
+    received = bytearray()
+    with open(path, 'rb') as file:
+        transfer = event_loop.sendfile.send_file(loop, socket_pair[0], file,
+                                                 offset=100, count=2 ** 19,
+                                                 on_done=mock)
+        receive_file(loop, socket_pair[1], received, 2 ** 19)
+        loop.run()
+    mock.assert_called_once_with(None)
+    assert received == payload[100:100 + 2 ** 19]
+    assert transfer.sent == 2 ** 19
+    assert not loop.write_streams
+
+
+def test_send_file_falls_back_to_readinto(loop, mock, socket_pair):
+    payload = os.urandom(2 ** 18)
+    received = bytearray()
+    transfer = event_loop.sendfile.send_file(loop, socket_pair[0],
+                                             io.BytesIO(payload), on_done=mock)
+    assert not transfer.zero_copy
+    receive_file(loop, socket_pair[1], received, len(payload))
+    loop.run()
+    mock.assert_called_once_with(None)
+    assert received == payload
+
+
+def test_send_file_stops_at_end_of_file(loop, mock, socket_pair, tmp_path):
+    path = tmp_path / 'payload'
+    path.write_bytes(b"foobar")
+    with open(path, 'rb') as file:
+        transfer = event_loop.sendfile.send_file(loop, socket_pair[0], file,
+                                                 offset=3, count=100,
+                                                 on_done=mock)
+        loop.run()
+    exc, = mock.call_args.args
+    assert isinstance(exc, EOFError)
+    assert transfer.sent == 3
+    assert socket_pair[1].recv(10) == b"bar"
+
+
+def test_send_file_does_not_block_the_loop(loop, mock, socket_pair, tmp_path):
+    path = tmp_path / 'payload'
+    path.write_bytes(bytes(2 ** 23))
+    socket_pair[0].setblocking(True)
+    def cancel():
+        if transfer.sent:
+            transfer.cancel()
+            loop.cancel_timer(timer)
+
+    with open(path, 'rb') as file:
+        transfer = event_loop.sendfile.send_file(loop, socket_pair[0], file,
+                                                 on_done=mock)
+        timer = loop.add_periodic_timer(0.01, cancel)
+        loop.run()
+    mock.assert_not_called()
+    assert transfer.sent < 2 ** 23
+    assert not socket_pair[0].getblocking()
+
+
+def test_send_file_reports_errors(loop, mock, socket_pair, tmp_path):
+    path = tmp_path / 'payload'
+    path.write_bytes(b"foo")
+    socket_pair[1].close()
+    with open(path, 'rb') as file:
+        event_loop.sendfile.send_file(loop, socket_pair[0], file, on_done=mock)
+        loop.run()
+    exc, = mock.call_args.args
+    assert isinstance(exc, OSError)
+    assert not loop.write_streams
+
+
+def test_server_accepts_a_batch_of_connections_per_event(loop, mock):
+    server = loop.create_server('127.0.0.1', 0, mock, batch=4)
+    clients = [socket.create_connection(server.address) for _ in range(6)]
+    try:
+        loop.next_tick()
+        assert mock.call_count == 4
+        loop.next_tick()
+        assert mock.call_count == 6
+        for call in mock.call_args_list:
+            conn, address = call.args
+            assert not conn.getblocking()
+            assert conn.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+            conn.close()
+    finally:
+        server.close()
+        for client in clients:
+            client.close()
+    assert not loop.read_streams
+
+
+class ExhaustedListener:
+    def __init__(self, sock, errors):
+        self.sock = sock
+        self.errors = list(errors)
+        self.family = sock.family
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def getsockname(self):
+        return self.sock.getsockname()
+
+    def accept(self):
+        if self.errors:
+            code = self.errors.pop(0)
+            raise OSError(code, os.strerror(code))
+        return self.sock.accept()
+
+    def close(self):
+        self.sock.close()
+
+
+def test_server_backs_off_when_accept_runs_out_of_resources(loop, mock,
+                                                          monkeypatch):
+    monkeypatch.setattr(event_loop.server, 'ACCEPT_RETRY_DELAY', 0.01)
+    listener = ExhaustedListener(event_loop.server.bind('127.0.0.1', 0),
+                                 [errno.EMFILE, errno.ENOBUFS])
+
+    def on_connection(conn, address):
+        mock()
+        conn.close()
+        server.close()
+
+    server = event_loop.server.serve(loop, listener, on_connection)
+    client = socket.create_connection(server.address)
+    try:
+        loop.next_tick()
+        assert server.retry_timer is not None
+        assert not loop.read_streams
+        loop.run()
+    finally:
+        client.close()
+    mock.assert_called_once()
+    assert server.accepted == 1
+    assert not listener.errors
+
+
+def test_server_stop_cancels_a_pending_accept_retry(loop, mock):
+    listener = ExhaustedListener(event_loop.server.bind('127.0.0.1', 0),
+                                 [errno.EMFILE])
+    server = event_loop.server.serve(loop, listener, mock)
+    client = socket.create_connection(server.address)
+    try:
+        loop.next_tick()
+        server.close()
+        assert server.retry_timer is None
+        testkit.assert_run_faster_than(loop, 0.05)
+    finally:
+        client.close()
+    mock.assert_not_called()
+
+
+def test_unix_server(loop, mock, tmp_path):
+    path = str(tmp_path / 'server.sock')
+    server = loop.create_server(path, None, mock)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    try:
+        loop.next_tick()
+        conn, _ = mock.call_args.args
+        client.send(b"foo")
+        conn.setblocking(True)
+        assert conn.recv(3) == b"foo"
+        conn.close()
+    finally:
+        client.close()
+        server.close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'SO_REUSEPORT'),
+                    reason="needs SO_REUSEPORT")
+def test_servers_share_a_port_with_reuse_port(loop, mock):
+    first = loop.create_server('127.0.0.1', 0, mock, reuse_port=True)
+    second = loop.create_server('127.0.0.1', first.address[1], mock,
+                                reuse_port=True)
+    assert second.address == first.address
+    first.close()
+    second.close()
+
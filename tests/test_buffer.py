@@ -0,0 +1,75 @@
+import pytest
+
+import event_loop.buffer
+
+
+class RecordingSocket:
+    def __init__(self, limit):
+        self.limit = limit
+        self.calls = []
+        self.data = bytearray()
+
+    def send(self, data):
+        return self.sendmsg([data])
+
+    def sendmsg(self, buffers):
+        buffers = list(buffers)
+        self.calls.append(len(buffers))
+        sent = b''.join(buffers)[:self.limit]
+        self.data += sent
+        return len(sent)
+
+
+@pytest.fixture
+def output():
+    return event_loop.buffer.OutputBuffer()
+
+
+def test_chunks_are_queued_without_copying(output):
+    payload = bytearray(b"foo")
+    output.append(payload)
+    output.append(b"")
+    assert len(output) == 3
+    assert len(output.chunks) == 1
+    assert output.chunks[0].obj is payload
+
+
+def test_flush_sends_all_chunks_in_one_call(output):
+    sock = RecordingSocket(limit=100)
+    output.extend([b"HTTP/1.1 200 OK\r\n", b"\r\n", memoryview(b"body")])
+    assert output.flush(sock) == 23
+    assert sock.calls == [3]
+    assert sock.data == b"HTTP/1.1 200 OK\r\n\r\nbody"
+    assert not output
+
+
+def test_partial_send_advances_through_memoryviews(output):
+    sock = RecordingSocket(limit=4)
+    output.extend([b"foo", b"barbaz", b"qux"])
+    output.flush(sock)
+    assert len(output) == 8
+    assert [bytes(chunk) for chunk in output.chunks] == [b"arbaz", b"qux"]
+    while output:
+        output.flush(sock)
+    assert sock.data == b"foobarbazqux"
+
+
+def test_flush_is_limited_to_max_chunks():
+    output = event_loop.buffer.OutputBuffer(limit=2)
+    sock = RecordingSocket(limit=100)
+    output.extend([b"a", b"b", b"c"])
+    output.flush(sock)
+    output.flush(sock)
+    assert sock.calls == [2, 1]
+    assert sock.data == b"abc"
+
+
+def test_multibyte_items_are_counted_in_bytes(output):
+    output.append(memoryview(bytearray(8)).cast('I'))
+    assert len(output) == 8
+
+
+def test_flush_over_socket(output, socket_pair):
+    output.extend([b"foo", b"bar"])
+    output.flush(socket_pair[0])
+    assert socket_pair[1].recv(6) == b"foobar"
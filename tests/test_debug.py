@@ -0,0 +1,77 @@
+import functools
+import time
+
+import event_loop
+import event_loop.debug
+
+
+def listener(stream):
+    pass
+
+
+class Handler:
+    def on_read(self, stream):
+        pass
+
+    def __call__(self):
+        pass
+
+
+def test_describe_function():
+    qualname, location = event_loop.debug.describe(listener)
+    assert qualname == 'listener'
+    assert location == '%s:%d' % (__file__, listener.__code__.co_firstlineno)
+
+
+def test_describe_bound_method_and_partial():
+    method = Handler().on_read
+    assert event_loop.debug.describe(method)[0] == 'Handler.on_read'
+    partial = functools.partial(functools.partial(method, None))
+    assert event_loop.debug.describe(partial)[0] == 'Handler.on_read'
+
+
+def test_describe_callable_object():
+    qualname, location = event_loop.debug.describe(Handler())
+    assert qualname == 'Handler'
+    assert location.endswith(':%d' % Handler.__call__.__code__.co_firstlineno)
+
+
+def test_describe_builtin():
+    assert event_loop.debug.describe(print) == ('print', None)
+
+
+def test_watchdog_dumps_stack_of_blocked_loop(mock):
+    def blocking_listener():
+        time.sleep(0.2)
+
+    loop = event_loop.SelectLoop()
+    watchdog = event_loop.debug.Watchdog(0.05, on_stall=mock)
+    detector = event_loop.debug.SlowCallbackDetector(threshold=1,
+                                                     watchdog=watchdog)
+    loop.set_instrument(detector)
+    loop.future_tick(blocking_listener)
+    loop.run()
+    detector.close()
+    mock.assert_called_once()
+    elapsed, stack = mock.call_args.args
+    assert elapsed >= 0.05
+    assert 'blocking_listener' in ''.join(stack)
+
+
+def test_watchdog_ignores_idle_loop(mock):
+    loop = event_loop.SelectLoop()
+    watchdog = event_loop.debug.Watchdog(0.05, on_stall=mock)
+    loop.set_instrument(event_loop.debug.SlowCallbackDetector(watchdog=watchdog))
+    loop.add_timer(0.2, lambda: None)
+    loop.run()
+    time.sleep(0.1)
+    watchdog.stop()
+    mock.assert_not_called()
+
+
+def test_enable_attaches_detector():
+    loop = event_loop.SelectLoop()
+    detector = event_loop.debug.enable(loop, threshold=0.5)
+    assert loop.instrument is detector
+    assert detector.threshold == 0.5
+    assert detector.watchdog is None
@@ -0,0 +1,107 @@
+import pytest
+import select
+import unittest
+
+import event_loop
+import event_loop.mode
+import tests.testkit as testkit
+from tests.loop_test_case import *
+
+
+@pytest.fixture
+def loop():
+    return event_loop.EpollLoop()
+
+
+@pytest.fixture
+def timer_budget():
+    return 256
+
+
+def test_read_io_fires_before_write_io_on_different_sockets(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], lambda stream: mock("read"))
+    loop.add_write_stream(socket_pair[1], lambda stream: mock("write"))
+    socket_pair[1].send(b"bar")
+    loop.next_tick()
+    expected = [unittest.mock.call("read"), unittest.mock.call("write")]
+    assert mock.call_args_list == expected
+
+
+def test_read_io_and_write_io_on_the_same_socket(loop, mock, socket_pair):
+    the_same, another = socket_pair
+    loop.add_read_stream(the_same, lambda stream: mock("read"))
+    loop.add_write_stream(the_same, lambda stream: mock("write"))
+    another.send(b"bar")
+    loop.next_tick()
+    expected = [unittest.mock.call("read"), unittest.mock.call("write")]
+    assert mock.call_args_list == expected
+
+
+def test_interest_mask_is_modified_in_place(loop, socket_pair):
+    fd = socket_pair[0].fileno()
+    loop.add_read_stream(socket_pair[0], lambda stream: None)
+    assert loop.registered[fd] == select.EPOLLIN
+    loop.add_write_stream(socket_pair[0], lambda stream: None)
+    assert loop.registered[fd] == select.EPOLLIN | select.EPOLLOUT
+    loop.remove_read_stream(socket_pair[0])
+    assert loop.registered[fd] == select.EPOLLOUT
+    loop.remove_write_stream(socket_pair[0])
+    assert fd not in loop.registered
+
+
+def test_remove_closed_stream(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], mock)
+    socket_pair[0].close()
+    loop.remove_read_stream(socket_pair[0])
+    assert not loop.read_streams
+    assert not loop.registered
+
+
+def test_edge_triggered_stream_is_notified_once_per_change(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.EDGE)
+    socket_pair[1].send(b"foo")
+    loop.next_tick()
+    loop.next_tick()
+    mock.assert_called_once()
+
+
+def test_oneshot_is_disarmed_by_the_kernel(loop, mock, socket_pair):
+    fd = socket_pair[1].fileno()
+    loop.add_write_stream(socket_pair[1], mock, mode=event_loop.mode.ONESHOT)
+    assert loop.registered[fd] == select.EPOLLOUT | select.EPOLLONESHOT
+    loop.next_tick()
+    assert loop.registered[fd] == 0
+    loop.rearm_write_stream(socket_pair[1])
+    assert loop.registered[fd] == select.EPOLLOUT | select.EPOLLONESHOT
+
+
+def test_mixed_modes_fall_back_to_level_triggered_mask(loop, mock, socket_pair):
+    fd = socket_pair[0].fileno()
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.ONESHOT)
+    loop.add_write_stream(socket_pair[0], mock)
+    assert loop.registered[fd] == select.EPOLLIN | select.EPOLLOUT
+    socket_pair[1].send(b"foo")
+    loop.next_tick()
+    assert loop.registered[fd] == select.EPOLLOUT
+    loop.next_tick()
+    assert mock.call_count == 3
+
+
+def test_edge_and_level_modes_cannot_share_a_fd(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.EDGE)
+    with pytest.raises(ValueError):
+        loop.add_write_stream(socket_pair[0], mock)
+    loop.add_write_stream(socket_pair[1], mock, mode=event_loop.mode.ONESHOT)
+    with pytest.raises(ValueError):
+        loop.add_read_stream(socket_pair[1], mock,
+                             mode=event_loop.mode.EDGE | event_loop.mode.ONESHOT)
+    assert socket_pair[0].fileno() not in loop.write_streams
+    assert socket_pair[1].fileno() not in loop.read_streams
+
+
+def test_edge_modes_can_share_a_fd(loop, mock, socket_pair):
+    fd = socket_pair[0].fileno()
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.EDGE)
+    loop.add_write_stream(socket_pair[0], mock,
+                          mode=event_loop.mode.EDGE | event_loop.mode.ONESHOT)
+    assert loop.registered[fd] & select.EPOLLET
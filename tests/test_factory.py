@@ -0,0 +1,66 @@
+import pytest
+import subprocess
+import sys
+
+import event_loop
+import event_loop.factory
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.delenv(event_loop.factory.ENVIRONMENT_VARIABLE, raising=False)
+
+
+def test_importing_the_package_does_not_import_native_backends():
+    code = ('import sys, event_loop; '
+            'print(sorted({"mood.event", "pyuv"} & set(sys.modules)))')
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.strip() == b'[]'
+
+
+def test_star_import_without_native_backends():
+    code = ('import sys; sys.modules["mood"] = sys.modules["pyuv"] = None; '
+            'from event_loop import *; print(SelectLoop.__name__)')
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.strip() == b'SelectLoop'
+
+
+def test_backends_are_exposed_lazily():
+    assert event_loop.PollLoop is event_loop.factory.load('poll')
+    with pytest.raises(AttributeError):
+        event_loop.MissingLoop
+
+
+def test_create_loop_with_preferred_backend():
+    assert isinstance(event_loop.create_loop(prefer='poll'), event_loop.PollLoop)
+
+
+def test_create_loop_passes_arguments_to_the_backend():
+    loop = event_loop.create_loop(prefer='select', slack=0.5)
+    assert isinstance(loop, event_loop.SelectLoop)
+    assert loop.slack == 0.5
+
+
+def test_create_loop_picks_the_first_available_backend(monkeypatch):
+    monkeypatch.setitem(event_loop.factory.BACKENDS, 'libuv',
+                        ('event_loop.missing_loop', 'MissingLoop'))
+    loop = event_loop.create_loop(prefer=['libuv', 'select'])
+    assert type(loop) is event_loop.SelectLoop
+
+
+def test_environment_variable_overrides_preference(monkeypatch):
+    monkeypatch.setenv(event_loop.factory.ENVIRONMENT_VARIABLE, 'poll, select')
+    loop = event_loop.create_loop(prefer='select')
+    assert isinstance(loop, event_loop.PollLoop)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        event_loop.create_loop(prefer='kqueue2')
+
+
+def test_no_available_backend(monkeypatch):
+    monkeypatch.setitem(event_loop.factory.BACKENDS, 'libuv',
+                        ('event_loop.missing_loop', 'MissingLoop'))
+    with pytest.raises(ImportError):
+        event_loop.create_loop(prefer='libuv')
@@ -0,0 +1,51 @@
+import math
+import pytest
+
+import event_loop.instrument
+
+
+@pytest.fixture
+def histogram():
+    return event_loop.instrument.Histogram(base=1, buckets=4)
+
+
+def test_values_are_counted_in_power_of_two_buckets(histogram):
+    for value in [0, 1, 2, 3, 4, 7, 8]:
+        histogram.add(value)
+    assert histogram.counts == [1, 1, 2, 2, 1]
+    assert histogram.count == 7
+    assert histogram.total == 25
+    assert histogram.max == 8
+
+
+def test_large_values_fall_into_the_last_bucket(histogram):
+    histogram.add(10 ** 6)
+    assert histogram.counts[-1] == 1
+
+
+def test_snapshot_lists_upper_bounds(histogram):
+    histogram.add(3)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == [(1, 0), (2, 0), (4, 1), (8, 0), (math.inf, 0)]
+
+
+def test_dispatch_times_the_callback():
+    clock = iter([1.0, 1.5]).__next__
+    instrument = event_loop.instrument.Instrument(clock=clock)
+    assert instrument.dispatch(event_loop.instrument.IO, 3, lambda x: x * 2, 21) == 42
+    assert instrument.callbacks[event_loop.instrument.IO] == 1
+    assert instrument.dispatch_time == 0.5
+
+
+def test_dispatch_records_failing_callback():
+    instrument = event_loop.instrument.Instrument()
+    with pytest.raises(ZeroDivisionError):
+        instrument.dispatch(event_loop.instrument.TICK, None, lambda: 1 / 0)
+    assert instrument.callbacks[event_loop.instrument.TICK] == 1
+
+
+def test_negative_lateness_is_clamped():
+    instrument = event_loop.instrument.Instrument()
+    instrument.late(-0.5)
+    assert instrument.lateness.max == 0
+    assert instrument.lateness.counts[0] == 1
@@ -1,6 +1,9 @@
+import gc
 import pytest
 import unittest
 
+import mood.event as libev
+
 import event_loop
 import tests.testkit as testkit
 from tests.loop_test_case import *
@@ -8,7 +11,13 @@ from tests.loop_test_case import *
 
 @pytest.fixture
 def loop():
-    return event_loop.LibevLoop()
+    yield event_loop.LibevLoop()
+    gc.collect()
+
+
+@pytest.fixture
+def timer_budget():
+    return 448
 
 
 def test_read_io_fires_before_write_io_on_different_sockets(loop, mock, socket_pair):
@@ -28,3 +37,35 @@ def test_read_io_and_write_io_on_the_same_socket(loop, mock, socket_pair):
     loop.next_tick()
     expected = [unittest.mock.call("read"), unittest.mock.call("write")]
     assert mock.call_args_list == expected
+
+
+def test_one_io_watcher_per_fd(loop, socket_pair):
+    loop.add_read_stream(socket_pair[0], lambda stream: None)
+    loop.add_write_stream(socket_pair[0], lambda stream: None)
+    assert list(loop.ios) == [socket_pair[0].fileno()]
+    loop.remove_read_stream(socket_pair[0])
+    assert loop.ios[socket_pair[0].fileno()].events == libev.EV_WRITE
+    loop.remove_write_stream(socket_pair[0])
+    assert not loop.ios
+
+
+def test_io_watcher_is_reused_after_removal(loop, socket_pair):
+    loop.add_read_stream(socket_pair[0], lambda stream: None)
+    ev_io = loop.ios[socket_pair[0].fileno()]
+    loop.remove_read_stream(socket_pair[0])
+    assert len(loop.io_pool) == 1
+    loop.add_write_stream(socket_pair[1], lambda stream: None)
+    assert loop.ios[socket_pair[1].fileno()] is ev_io
+    assert ev_io.fd == socket_pair[1].fileno()
+    assert ev_io.events == libev.EV_WRITE
+
+
+def test_timer_watcher_is_reused_after_cancel(loop, mock):
+    timer = loop.add_timer(10, lambda: None)
+    watcher = timer.handle
+    loop.cancel_timer(timer)
+    another = loop.add_periodic_timer(0.001,
+                                     lambda: mock(loop.cancel_timer(another)))
+    assert another.handle is watcher
+    loop.run()
+    assert mock.call_count == 1
@@ -11,6 +11,11 @@ def loop():
     return event_loop.LibuvLoop()
 
 
+@pytest.fixture
+def timer_budget():
+    return 512
+
+
 def test_read_io_fires_before_write_io_on_different_sockets(loop, mock, socket_pair):
     loop.add_read_stream(socket_pair[0], lambda stream: mock("read"))
     loop.add_write_stream(socket_pair[1], lambda stream: mock("write"))
@@ -26,5 +31,36 @@ def test_read_io_and_write_io_on_the_same_socket(loop, mock, socket_pair):
     loop.add_write_stream(the_same, lambda stream: mock("write"))
     another.send(b"bar")
     loop.next_tick()
-    expected = [unittest.mock.call("write")]
+    expected = [unittest.mock.call("read"), unittest.mock.call("write")]
     assert mock.call_args_list == expected
+
+
+def test_one_poll_handle_per_fd(loop, socket_pair):
+    loop.add_read_stream(socket_pair[0], lambda stream: None)
+    loop.add_write_stream(socket_pair[0], lambda stream: None)
+    assert list(loop.polls) == [socket_pair[0].fileno()]
+    loop.remove_read_stream(socket_pair[0])
+    assert list(loop.polls) == [socket_pair[0].fileno()]
+    loop.remove_write_stream(socket_pair[0])
+    assert not loop.polls
+
+
+def test_poll_handle_is_reused_for_the_same_fd(loop, socket_pair):
+    loop.add_read_stream(socket_pair[0], lambda stream: None)
+    uv_poll = loop.polls[socket_pair[0].fileno()]
+    loop.remove_read_stream(socket_pair[0])
+    assert loop.idle_polls == {socket_pair[0].fileno(): uv_poll}
+    loop.add_write_stream(socket_pair[0], lambda stream: None)
+    assert loop.polls[socket_pair[0].fileno()] is uv_poll
+    assert not loop.idle_polls
+
+
+def test_timer_watcher_is_reused_after_cancel(loop, mock):
+    timer = loop.add_timer(10, lambda: None)
+    watcher = timer.handle
+    loop.cancel_timer(timer)
+    another = loop.add_periodic_timer(0.001,
+                                     lambda: mock(loop.cancel_timer(another)))
+    assert another.handle is watcher
+    loop.run()
+    assert mock.call_count == 1
@@ -0,0 +1,92 @@
+import errno
+import pytest
+import resource
+import select
+import unittest
+
+import event_loop
+import event_loop.mode
+import tests.testkit as testkit
+from tests.loop_test_case import *
+
+
+@pytest.fixture
+def loop():
+    return event_loop.PollLoop()
+
+
+@pytest.fixture
+def timer_budget():
+    return 256
+
+
+def test_read_io_fires_before_write_io_on_different_sockets(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], lambda stream: mock("read"))
+    loop.add_write_stream(socket_pair[1], lambda stream: mock("write"))
+    socket_pair[1].send(b"bar")
+    loop.next_tick()
+    expected = [unittest.mock.call("read"), unittest.mock.call("write")]
+    assert mock.call_args_list == expected
+
+
+def test_read_io_and_write_io_on_the_same_socket(loop, mock, socket_pair):
+    the_same, another = socket_pair
+    loop.add_read_stream(the_same, lambda stream: mock("read"))
+    loop.add_write_stream(the_same, lambda stream: mock("write"))
+    another.send(b"bar")
+    loop.next_tick()
+    expected = [unittest.mock.call("read"), unittest.mock.call("write")]
+    assert mock.call_args_list == expected
+
+
+def test_interest_mask_is_modified_in_place(loop, socket_pair):
+    fd = socket_pair[0].fileno()
+    loop.add_read_stream(socket_pair[0], lambda stream: None)
+    assert loop.registered[fd] == select.POLLIN
+    loop.add_write_stream(socket_pair[0], lambda stream: None)
+    assert loop.registered[fd] == select.POLLIN | select.POLLOUT
+    loop.remove_read_stream(socket_pair[0])
+    assert loop.registered[fd] == select.POLLOUT
+    loop.remove_write_stream(socket_pair[0])
+    assert fd not in loop.registered
+
+
+def test_oneshot_stream_is_unregistered_until_rearmed(loop, mock, socket_pair):
+    fd = socket_pair[0].fileno()
+    loop.add_read_stream(socket_pair[0], mock, mode=event_loop.mode.ONESHOT)
+    socket_pair[1].send(b"foo")
+    loop.next_tick()
+    assert fd not in loop.registered
+    loop.rearm_read_stream(socket_pair[0])
+    assert loop.registered[fd] == select.POLLIN
+
+
+def test_closed_stream_is_reported_until_removed(loop, mock, socket_pair):
+    fd = socket_pair[0].fileno()
+    loop.add_read_stream(socket_pair[0], mock)
+    socket_pair[0].close()
+    for _ in range(2):
+        with pytest.raises(OSError) as excinfo:
+            loop.run()
+        assert excinfo.value.errno == errno.EBADF
+    assert fd in loop.registered
+    loop.remove_read_stream(socket_pair[0])
+    assert fd not in loop.registered
+    loop.run()
+    mock.assert_not_called()
+
+
+@pytest.mark.skipif(resource.getrlimit(resource.RLIMIT_NOFILE)[0] < 2048,
+                    reason="needs more than FD_SETSIZE open files")
+def test_more_fds_than_fd_setsize(loop, mock):
+    pairs = [testkit.create_socket_pair() for _ in range(600)]
+    try:
+        for first, second in pairs:
+            loop.add_read_stream(first, lambda stream: mock(stream.recv(3)))
+        pairs[-1][1].send(b"foo")
+        loop.next_tick()
+    finally:
+        for pair in pairs:
+            for stream in pair:
+                stream.close()
+    mock.assert_called_once_with(b"foo")
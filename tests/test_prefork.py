@@ -0,0 +1,166 @@
+import json
+import os
+import pytest
+import signal
+import socket
+
+import event_loop.factory
+import event_loop.prefork
+import event_loop.server
+
+
+def reply_with_pid(loop, conn, address):
+    conn.send(b"%d" % os.getpid())
+    conn.close()
+
+
+def request(address):
+    with socket.create_connection(address, timeout=5) as client:
+        return int(client.recv(16))
+
+
+@pytest.fixture(autouse=True)
+def signal_handlers(monkeypatch):
+    monkeypatch.setattr(event_loop.prefork, 'RESTART_DELAY', 0.01)
+    handlers = {signum: signal.getsignal(signum)
+                for signum in event_loop.prefork.WORKER_SIGNALS}
+    yield
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+@pytest.mark.parametrize('backend', event_loop.factory.PREFERENCE)
+def test_supervisor_restarts_crashed_workers_and_drains_on_sigterm(backend):
+    if not event_loop.factory.available(backend):
+        pytest.skip("%s is not available" % backend)
+    served = set()
+    killed = []
+    workers = set()
+
+    def on_stats(stats):
+        workers.add(stats['pid'])
+        pids = {worker['pid'] for worker in supervisor.stats()
+                if 'accepted' in worker}
+        if not killed and len(pids) == 2:
+            address = supervisor.sock.getsockname()
+            served.update(request(address) for _ in range(10))
+            killed.append(supervisor.workers[0].pid)
+            os.kill(killed[0], signal.SIGKILL)
+        elif (len(killed) == 1 and stats['id'] == 0 and
+              stats['pid'] not in killed and 'accepted' in stats):
+            killed.append(stats['pid'])
+            served.add(request(supervisor.sock.getsockname()))
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    supervisor = event_loop.prefork.Supervisor(
+        reply_with_pid, '127.0.0.1', 0, workers=2, backend=backend,
+        on_stats=on_stats, stats_interval=0.05
+    )
+    supervisor.run()
+    first, second = supervisor.stats()
+    assert first['restarts'] == 1
+    assert second['restarts'] == 0
+    assert first['exit_status'] == second['exit_status'] == 0
+    assert len(workers) == 3
+    assert served <= workers
+    assert first['accepted'] + second['accepted'] >= 1
+    assert not supervisor.alive()
+
+
+def test_workers_bind_their_own_socket_with_reuse_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    served = []
+    workers = set()
+
+    def on_stats(stats):
+        workers.add(stats['pid'])
+        if not served and all('accepted' in worker
+                              for worker in supervisor.stats()):
+            served.append(request(('127.0.0.1', port)))
+            supervisor.stop()
+
+    supervisor = event_loop.prefork.Supervisor(
+        reply_with_pid, '127.0.0.1', port, workers=2, backend='select',
+        reuse_port=True, on_stats=on_stats, stats_interval=0.05
+    )
+    supervisor.run()
+    assert supervisor.sock is None
+    assert served[0] in workers
+
+
+def test_reuse_port_needs_an_explicit_port():
+    with pytest.raises(ValueError):
+        event_loop.prefork.Supervisor(reply_with_pid, '127.0.0.1', 0,
+                                      reuse_port=True)
+
+
+def keep_alive(loop, conn, address):
+    def read(conn):
+        if not conn.recv(16):
+            loop.remove_read_stream(conn)
+            conn.close()
+
+    conn.send(b"%d" % os.getpid())
+    loop.add_read_stream(conn, read)
+
+
+def test_reload_starts_new_workers_before_old_ones_drain():
+    old = {}
+    clients = []
+    served = []
+
+    def closed(client):
+        served.append(client.recv(16))
+        supervisor.loop.remove_read_stream(client)
+        supervisor.stop()
+
+    def on_stats(stats):
+        if 'accepted' not in stats:
+            return
+        if not old:
+            if all('accepted' in worker for worker in supervisor.stats()):
+                old.update((worker['pid'], worker['id'])
+                           for worker in supervisor.stats())
+                address = supervisor.sock.getsockname()
+                client = socket.create_connection(address, timeout=5)
+                clients.append(client)
+                served.append(int(client.recv(16)))
+                os.kill(os.getpid(), signal.SIGHUP)
+        elif stats['pid'] not in old and len(served) == 1:
+            assert served[0] in supervisor.retired
+            served.append(request(supervisor.sock.getsockname()))
+            supervisor.loop.add_read_stream(clients[0], closed)
+
+    supervisor = event_loop.prefork.Supervisor(
+        keep_alive, '127.0.0.1', 0, workers=2, backend='select',
+        on_stats=on_stats, stats_interval=0.05, drain_timeout=0.2
+    )
+    supervisor.run()
+    first, second = supervisor.stats()
+    assert served[0] in old
+    assert served[1] not in old
+    assert served[2] == b""
+    assert first['restarts'] == second['restarts'] == 0
+    assert first['pid'] not in old and second['pid'] not in old
+    assert not supervisor.retired
+    assert not supervisor.alive()
+    clients[0].close()
+
+
+def test_stats_are_dropped_while_the_pipe_is_full():
+    supervisor = event_loop.prefork.Supervisor(reply_with_pid, '127.0.0.1', 0,
+                                               workers=1, backend='select')
+    supervisor.sock = event_loop.server.bind('127.0.0.1', 0)
+    reader, writer = os.pipe()
+    process = event_loop.prefork.WorkerProcess(supervisor,
+                                               supervisor.workers[0], writer)
+    for _ in range(10000):
+        process.report()
+    os.close(writer)
+    with open(reader, 'rb') as fp:
+        lines = fp.read().splitlines()
+    supervisor.sock.close()
+    assert 0 < len(lines) < 10000
+    assert all(json.loads(line)['accepted'] == 0 for line in lines)
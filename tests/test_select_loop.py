@@ -1,4 +1,6 @@
 import pytest
+import socket
+import time
 import unittest
 
 import event_loop
@@ -11,6 +13,11 @@ def loop():
     return event_loop.SelectLoop()
 
 
+@pytest.fixture
+def timer_budget():
+    return 256
+
+
 def test_read_io_fires_before_write_io_on_different_sockets(loop, mock, socket_pair):
     loop.add_read_stream(socket_pair[0], lambda stream: mock("read"))
     loop.add_write_stream(socket_pair[1], lambda stream: mock("write"))
@@ -28,3 +35,59 @@ def test_read_io_and_write_io_on_the_same_socket(loop, mock, socket_pair):
     loop.next_tick()
     expected = [unittest.mock.call("read"), unittest.mock.call("write")]
     assert mock.call_args_list == expected
+
+
+def test_time_to_sleep_is_measured_in_seconds(loop):
+    assert loop.time_to_sleep(1.5) == 1.5
+    assert loop.time_to_sleep(-1) == 0
+    assert loop.time_to_sleep(10 ** 12) == event_loop.select_loop.MAX_TIMEOUT
+
+
+def test_loop_slack_is_the_default_timer_slack():
+    loop = event_loop.SelectLoop(slack=0.01)
+    assert loop.add_timer(1, lambda: None).slack == 0.01
+    assert loop.add_periodic_timer(1, lambda: None, slack=0.5).slack == 0.5
+
+
+def test_ready_streams_are_dispatched_in_registration_order(loop, mock):
+    pairs = [testkit.create_socket_pair() for _ in range(3)]
+    for i, pair in enumerate(reversed(pairs)):
+        loop.add_read_stream(pair[0], lambda stream, i=i: mock(i))
+    for pair in pairs:
+        pair[1].send(b"foo")
+    loop.next_tick()
+    for pair in pairs:
+        for stream in pair:
+            stream.close()
+    assert mock.call_args_list == [unittest.mock.call(i) for i in range(3)]
+
+
+def test_streams_are_registered_by_fd(loop, mock, socket_pair):
+    loop.add_read_stream(socket_pair[0], mock)
+    alias = socket.socket(fileno=socket_pair[0].fileno())
+    try:
+        loop.remove_read_stream(alias)
+    finally:
+        alias.detach()
+    assert not loop.read_streams
+    assert not loop.read_listeners
+
+
+def test_removing_many_streams_is_linear(loop):
+    streams = [testkit.FakeStream(fd) for fd in range(10000)]
+    for stream in streams:
+        loop.add_read_stream(stream, lambda stream: None)
+    start = time.monotonic()
+    for stream in streams:
+        loop.remove_read_stream(stream)
+    assert time.monotonic() - start < 0.5
+    assert not loop.read_streams
+
+
+def test_stream_registration_fits_its_memory_budget(loop):
+    streams = iter([testkit.FakeStream(fd) for fd in range(10000)])
+    listener = lambda stream: None
+    allocated = testkit.allocated_per_call(
+        lambda: loop.add_read_stream(next(streams), listener)
+    )
+    assert allocated <= 128
@@ -0,0 +1,47 @@
+import errno
+import os
+
+import event_loop
+import event_loop.sendfile
+
+
+def test_unsupported_sendfile_falls_back_to_readinto(mock, socket_pair,
+                                                     tmp_path, monkeypatch):
+    def sendfile(*args):
+        raise OSError(errno.EINVAL, os.strerror(errno.EINVAL))
+
+    monkeypatch.setattr(event_loop.sendfile.os, 'sendfile', sendfile)
+    path = tmp_path / 'payload'
+    path.write_bytes(b"foobar")
+    loop = event_loop.SelectLoop()
+    with open(path, 'rb') as file:
+        transfer = event_loop.sendfile.send_file(loop, socket_pair[0], file,
+                                                 on_done=mock)
+        loop.run()
+    assert not transfer.zero_copy
+    mock.assert_called_once_with(None)
+    assert socket_pair[1].recv(10) == b"foobar"
+
+
+def test_send_file_to_a_pipe(mock, tmp_path):
+    path = tmp_path / 'payload'
+    path.write_bytes(b"foobar")
+    reader, writer = os.pipe()
+    loop = event_loop.SelectLoop()
+    with open(path, 'rb') as file, open(writer, 'wb', closefd=True) as target:
+        event_loop.sendfile.send_file(loop, target, file, on_done=mock)
+        loop.run()
+    mock.assert_called_once_with(None)
+    assert os.read(reader, 10) == b"foobar"
+    os.close(reader)
+
+
+def test_empty_range_finishes_immediately(mock, socket_pair, tmp_path):
+    path = tmp_path / 'payload'
+    path.write_bytes(b"foo")
+    loop = event_loop.SelectLoop()
+    with open(path, 'rb') as file:
+        event_loop.sendfile.send_file(loop, socket_pair[0], file, offset=3,
+                                      on_done=mock)
+    mock.assert_called_once_with(None)
+    assert not loop.write_streams
@@ -1,4 +1,5 @@
 import pytest
+import queue
 import unittest
 
 import event_loop.tick
@@ -27,3 +28,25 @@ def test_call_tick(future_tick_queue, mock):
                 unittest.mock.call(2),
                 unittest.mock.call(3)]
     assert mock.call_args_list == expected
+
+
+def test_tick_runs_only_listeners_queued_before_it_started(future_tick_queue, mock):
+    future_tick_queue.add(lambda: future_tick_queue.add(lambda: mock(2)))
+    future_tick_queue.add(lambda: mock(1))
+    future_tick_queue.tick()
+    assert mock.call_args_list == [unittest.mock.call(1)]
+    assert not future_tick_queue.empty()
+    future_tick_queue.tick()
+    assert mock.call_args_list == [unittest.mock.call(1), unittest.mock.call(2)]
+    assert future_tick_queue.empty()
+
+
+def test_bounded_tick_queue_rejects_listeners_when_full(mock):
+    future_tick_queue = event_loop.tick.FutureTickQueue(2)
+    future_tick_queue.add(mock)
+    future_tick_queue.add(mock)
+    with pytest.raises(queue.Full):
+        future_tick_queue.add(mock)
+    future_tick_queue.tick()
+    future_tick_queue.add(mock)
+    assert mock.call_count == 2
@@ -95,3 +95,134 @@ def test_contains(timers, mock):
     assert timer1 in timers
     assert timer2 in timers
     assert timer3 not in timers
+
+
+def test_cancel_leaves_tombstone_until_head_is_reached(timers):
+    timer1 = event_loop.timer.Timer(1, lambda: None)
+    timer2 = event_loop.timer.Timer(2, lambda: None)
+    timers.add(timer1)
+    timers.add(timer2)
+    timers.cancel(timer1)
+    assert len(timers.schedule) == 2
+    _, first_timer = timers.get_first()
+    assert first_timer is timer2
+    assert len(timers.schedule) == 1
+
+
+def test_cancelled_timers_are_compacted(timers):
+    pending = [event_loop.timer.Timer(10, lambda: None) for _ in range(1000)]
+    for timer in pending:
+        timers.add(timer)
+    for timer in pending[:-1]:
+        timers.cancel(timer)
+    assert len(timers.schedule) <= 2 * event_loop.timer.MIN_COMPACTION_SIZE
+    _, first_timer = timers.get_first()
+    assert first_timer is pending[-1]
+
+
+def test_cancel_and_add_again_uses_new_deadline(timers, mock):
+    timer = event_loop.timer.Timer(0, mock)
+    timers.add(timer)
+    timers.cancel(timer)
+    timer.interval = 10
+    timers.add(timer)
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_not_called()
+    assert timer in timers
+
+
+def test_periodic_timer_cancels_itself(timers, mock):
+    timer = event_loop.timer.Timer(0, lambda: mock(timers.cancel(timer)),
+                                   periodic=True)
+    timers.add(timer)
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_called_once_with(True)
+    assert timers.empty()
+    assert timers.get_first() is None
+
+
+def test_same_deadline_timers_keep_insertion_order(timers, mock):
+    for i in range(10):
+        timers.add(event_loop.timer.Timer(0, lambda i=i: mock(i)))
+
+    for entry in timers.schedule:
+        entry[0] = 0
+    time.sleep(0.01)
+    timers.tick()
+    assert mock.call_args_list == [unittest.mock.call(i) for i in range(10)]
+
+
+def test_coalesce_rounds_up_to_a_multiple_of_slack():
+    assert event_loop.timer.coalesce(10.3, 0) == 10.3
+    assert event_loop.timer.coalesce(10.3, 0.5) == 10.5
+    assert event_loop.timer.coalesce(10.5, 0.5) == 10.5
+
+
+def test_timers_within_slack_share_a_deadline(timers, mock):
+    timers.update_time = lambda: 100.02
+    for interval in [0.01, 0.03, 0.05]:
+        timers.add(event_loop.timer.Timer(interval, mock, slack=0.1))
+
+    assert len({entry[0] for entry in timers.schedule}) == 1
+    scheduled_at, _ = timers.get_first()
+    assert scheduled_at == pytest.approx(100.1)
+
+
+def test_postponed_timer_keeps_its_heap_entry(timers, mock):
+    timers.update_time = lambda: 100
+    timer = event_loop.timer.Timer(0.01, mock)
+    timers.add(timer)
+    entry = timers.schedule[0]
+    timer.interval = 10
+    timers.reschedule(timer)
+    assert timers.schedule == [entry]
+    assert entry[3] == 110
+
+
+def test_postponed_timer_is_not_fired_at_its_old_deadline(timers, mock):
+    timer = event_loop.timer.Timer(0, mock)
+    timers.add(timer)
+    timer.interval = 10
+    timers.reschedule(timer)
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_not_called()
+    scheduled_at, first_timer = timers.get_first()
+    assert first_timer is timer
+    assert scheduled_at > timers.get_time() + 9
+
+
+def test_advanced_timer_is_pushed_again(timers, mock):
+    timer = event_loop.timer.Timer(10, mock)
+    timers.add(timer)
+    timer.interval = 0
+    timers.reschedule(timer)
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_called_once()
+    assert timers.empty()
+
+
+def test_reschedule_adds_a_fired_timer_again(timers, mock):
+    timer = event_loop.timer.Timer(0, mock)
+    timers.add(timer)
+    time.sleep(0.01)
+    timers.tick()
+    timers.reschedule(timer)
+    assert timer in timers
+
+
+def test_timer_has_no_instance_dict():
+    timer = event_loop.timer.Timer(1, lambda: None)
+    assert not hasattr(timer, '__dict__')
+
+
+def test_timer_handle_is_its_schedule_entry(timers):
+    timer = event_loop.timer.Timer(1, lambda: None)
+    timers.add(timer)
+    assert timers.schedule == [timer.handle]
+    timers.cancel(timer)
+    assert timer.handle is None
+    assert timers.empty()
@@ -0,0 +1,155 @@
+import pytest
+import time
+import unittest
+
+import event_loop
+import event_loop.instrument
+import event_loop.timer
+import tests.testkit as testkit
+from tests.loop_test_case import *
+
+
+@pytest.fixture
+def loop():
+    return event_loop.SelectLoop(timers=event_loop.timer.TimingWheel())
+
+
+@pytest.fixture
+def timer_budget():
+    return 320
+
+
+@pytest.fixture
+def timers():
+    return event_loop.timer.TimingWheel(resolution=0.001)
+
+
+def test_order_of_execution_of_timers(timers, mock):
+    timers.add(event_loop.timer.Timer(0, lambda: mock(1)))
+    timers.add(event_loop.timer.Timer(0, lambda: mock(2)))
+    time.sleep(0.01)
+    timers.tick()
+    expected = [unittest.mock.call(1), unittest.mock.call(2)]
+    assert mock.call_args_list == expected
+
+
+def test_only_some_timers_will_be_fulfilled(timers, mock):
+    for interval in [3, 0, 4]:
+        timers.add(event_loop.timer.Timer(interval, mock))
+
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_called_once()
+    assert not timers.empty()
+
+
+def test_periodic_timer_is_rescheduled(timers, mock):
+    timer = event_loop.timer.Timer(0.005, mock, periodic=True)
+    timers.add(timer)
+    for _ in range(3):
+        time.sleep(0.006)
+        timers.tick()
+    assert mock.call_count == 3
+    assert timer in timers
+
+
+def test_cancel_timer(timers, mock):
+    timer1 = event_loop.timer.Timer(0, mock)
+    timer2 = event_loop.timer.Timer(0.2, mock)
+    timers.add(timer1)
+    assert timers.cancel(timer1)
+    assert not timers.cancel(timer2)
+    assert timers.empty()
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_not_called()
+
+
+def test_timer_cancels_another_timer_of_the_same_slot(timers, mock):
+    timer2 = event_loop.timer.Timer(0, lambda: mock(2))
+    timers.add(event_loop.timer.Timer(0, lambda: timers.cancel(timer2)))
+    timers.add(timer2)
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_not_called()
+
+
+def test_far_timers_cascade_to_lower_levels(timers, mock):
+    intervals = [0.1, 5, 300, 10 ** 5]
+    for interval in intervals:
+        timers.add(event_loop.timer.Timer(interval, lambda i=interval: mock(i)))
+    timers.update_time = lambda: timers.time
+    for interval in intervals:
+        timers.time = time.monotonic() + interval + 0.01
+        timers.tick()
+    assert mock.call_args_list == [unittest.mock.call(i) for i in intervals]
+    assert timers.empty()
+    assert not any(timers.occupied)
+
+
+def test_get_first_timer():
+    timers = event_loop.timer.TimingWheel(resolution=1)
+    timers.update_time = lambda: timers.time
+    timers.time = timers.current = 64 * 1000 + 1
+    for interval in [6000, 10, 4000]:
+        timers.add(event_loop.timer.Timer(interval, lambda: None))
+
+    scheduled_at, first_timer = timers.get_first()
+    assert first_timer.interval == 10
+    assert scheduled_at == timers.get_time() + 10
+
+
+def test_get_first_returns_the_earliest_deadline(timers):
+    timers.add(event_loop.timer.Timer(100, lambda: None))
+    scheduled_at, _ = timers.get_first()
+    deadline = timers.to_ticks(timers.get_time() + 100)
+    assert scheduled_at == deadline * timers.resolution
+
+
+def test_get_first_accounts_for_earlier_higher_level_timers(mock):
+    timers = event_loop.timer.TimingWheel(resolution=1)
+    timers.update_time = lambda: timers.time
+    timers.time = timers.current = 64 * 1000 + 1
+    timers.add(event_loop.timer.Timer(70, lambda: mock('far')))
+    timers.time = 64 * 1000 + 40
+    timers.tick()
+    timers.add(event_loop.timer.Timer(60, lambda: mock('near')))
+    scheduled_at, _ = timers.get_first()
+    assert scheduled_at <= 64 * 1000 + 71
+    while not mock.called:
+        timers.time, _ = timers.get_first()
+        timers.tick()
+    assert timers.time == 64 * 1000 + 71
+    mock.assert_called_once_with('far')
+
+
+def test_idle_loop_sleeps_until_the_deadline(loop, mock):
+    instrument = event_loop.instrument.Instrument()
+    loop.set_instrument(instrument)
+    loop.add_timer(0.3, mock)
+    loop.run()
+    mock.assert_called_once()
+    assert instrument.iterations <= 3
+
+
+def test_get_first_timer_if_schedule_is_empty(timers):
+    assert timers.get_first() is None
+
+
+def test_contains(timers, mock):
+    timer1 = event_loop.timer.Timer(0.1, mock)
+    timer2 = event_loop.timer.Timer(0.4, mock)
+    timers.add(timer1)
+    assert timer1 in timers
+    assert timer2 not in timers
+
+
+def test_reschedule_moves_the_deadline(timers, mock):
+    timer = event_loop.timer.Timer(0, mock)
+    timers.add(timer)
+    timer.interval = 10
+    timers.reschedule(timer)
+    time.sleep(0.01)
+    timers.tick()
+    mock.assert_not_called()
+    assert timer in timers
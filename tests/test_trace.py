@@ -0,0 +1,62 @@
+import itertools
+import json
+import os
+import signal
+
+import event_loop
+import event_loop.instrument
+import event_loop.trace
+
+
+def test_callbacks_are_exported_as_complete_events():
+    clock = itertools.count(1).__next__
+    tracer = event_loop.trace.Tracer(clock=clock)
+    tracer.dispatch(event_loop.instrument.IO, 7, lambda stream: None, None)
+    event, = tracer.export()['traceEvents']
+    assert event['name'] == 'test_callbacks_are_exported_as_complete_events.<locals>.<lambda>'
+    assert event['cat'] == event_loop.instrument.IO
+    assert event['ph'] == 'X'
+    assert event['ts'] == 1000000
+    assert event['dur'] == 1000000
+    assert event['args'] == {'fd': 7}
+
+
+def test_iterations_and_polls_are_recorded():
+    clock = itertools.count().__next__
+    tracer = event_loop.trace.Tracer(clock=clock)
+    tracer.begin_iteration(2, 1)
+    tracer.begin_poll()
+    tracer.end_poll()
+    tracer.end_run()
+    poll, iteration = tracer.export()['traceEvents']
+    assert (poll['name'], poll['ts'], poll['dur']) == ('poll', 1000000, 1000000)
+    assert iteration['name'] == 'iteration'
+    assert iteration['args'] == {'ticks': 2, 'timers': 1}
+    assert iteration['ts'] <= poll['ts']
+    assert iteration['ts'] + iteration['dur'] >= poll['ts'] + poll['dur']
+
+
+def test_ring_buffer_keeps_the_latest_events():
+    tracer = event_loop.trace.Tracer(capacity=2)
+    for signum in range(5):
+        tracer.dispatch(event_loop.instrument.SIGNAL, signum, lambda: None)
+    trace = tracer.export()
+    assert [event['args']['signum'] for event in trace['traceEvents']] == [3, 4]
+    assert trace['otherData']['dropped'] == 3
+    tracer.clear()
+    assert tracer.export()['traceEvents'] == []
+
+
+def test_trace_is_dumped_on_signal(tmp_path):
+    path = str(tmp_path / 'trace.json')
+    loop = event_loop.SelectLoop()
+    tracer = event_loop.trace.enable(loop, signum=signal.SIGUSR2, path=path)
+    assert loop.instrument is tracer
+    loop.add_timer(0.01, lambda: os.kill(os.getpid(), signal.SIGUSR2))
+    loop.add_timer(0.05, lambda: loop.remove_signal(signal.SIGUSR2,
+                                                    tracer.on_signal))
+    loop.run()
+    with open(path) as fp:
+        trace = json.load(fp)
+    categories = {event['cat'] for event in trace['traceEvents']}
+    assert {'loop', event_loop.instrument.TIMER} <= categories
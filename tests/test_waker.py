@@ -0,0 +1,66 @@
+import pytest
+import select
+
+import event_loop.waker
+
+
+@pytest.fixture
+def waker():
+    waker = event_loop.waker.Waker()
+    yield waker
+    waker.close()
+
+
+def readable(waker):
+    ready, _, _ = select.select([waker], [], [], 0)
+    return bool(ready)
+
+
+def test_waker_is_not_readable_initially(waker):
+    assert not readable(waker)
+
+
+def test_wake_makes_waker_readable(waker):
+    waker.wake()
+    assert readable(waker)
+    waker.drain()
+    assert not readable(waker)
+
+
+def test_wakes_are_coalesced_until_drained(waker, monkeypatch):
+    writes = []
+    write = event_loop.waker.os.write
+    monkeypatch.setattr(event_loop.waker.os, 'write',
+                        lambda fd, data: writes.append(fd) or write(fd, data))
+    for _ in range(10):
+        waker.wake()
+    assert len(writes) == 1
+    waker.drain()
+    waker.wake()
+    assert len(writes) == 2
+
+
+def test_wake_racing_with_drain_is_not_lost(waker, monkeypatch):
+    read = event_loop.waker.os.read
+
+    def racing_read(fd, size):
+        monkeypatch.setattr(event_loop.waker.os, 'read', read)
+        waker.wake()
+        return read(fd, size)
+
+    waker.wake()
+    monkeypatch.setattr(event_loop.waker.os, 'read', racing_read)
+    waker.drain()
+    waker.wake()
+    assert readable(waker)
+
+
+def test_pipe_fallback(monkeypatch):
+    monkeypatch.delattr(event_loop.waker.os, 'eventfd', raising=False)
+    waker = event_loop.waker.Waker()
+    assert waker.reader != waker.writer
+    waker.wake()
+    assert readable(waker)
+    waker.drain()
+    assert not readable(waker)
+    waker.close()
@@ -1,5 +1,6 @@
 import socket
 import time
+import tracemalloc
 
 
 def assert_run_faster_than(loop, max_interval):
@@ -29,3 +30,24 @@ def create_socket_pair():
     first.setblocking(False)
     second.setblocking(False)
     return (first, second)
+
+
+class FakeStream:
+    def __init__(self, fd):
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+
+def allocated_per_call(fn, count=10000):
+    results = [None] * count
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for i in range(count):
+            results[i] = fn()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (after - before) / count